@@ -19,8 +19,10 @@ class BatchGrammarClassifier:
 
         self.name = name
 
-        transformation_functions = [ParseTools.remove_ats, ParseTools.remove_hts, ParseTools.replace_ats_with("John"), ParseTools.replace_ats_with("go")]
-        trans_func_powerset = self.power_set(transformation_functions)
+        self.grammar = grammar
+        self.transformation_functions = [ParseTools.remove_ats, ParseTools.remove_hts, ParseTools.replace_ats_with("John"), ParseTools.replace_ats_with("go")]
+        self.transformation_subsets = self.power_set(range(len(self.transformation_functions)))
+        trans_func_powerset = self.power_set(self.transformation_functions)
         self.grammar_functions = [grammar.get_avg_error_func(subset) for subset in trans_func_powerset]
 
         if model_dict is None:
@@ -53,9 +55,43 @@ class BatchGrammarClassifier:
 
         return df
 
+    def grammar_features(self, data):
+        """
+            Same as label_apply(data, self.grammar_functions), computed with every transformation applied
+            to each distinct string once, and every distinct transformed string checked once.
+
+            Transformation subsets are in combination order, so each subset's chain extends a shorter
+            subset's chain, and only its last transformation needs to be applied.
+        """
+        transformed_cache = dict()
+
+        def transform(index, string):
+            key = (index, string)
+            if key not in transformed_cache:
+                transformed_cache[key] = self.transformation_functions[index](string)
+            return transformed_cache[key]
+
+        transformed = []
+        for example in data:
+            chains = {(): example}
+            for subset in self.transformation_subsets[1:]:
+                subset = tuple(subset)
+                chains[subset] = transform(subset[-1], chains[subset[:-1]])
+            transformed.append([chains[()]] + [chains[tuple(subset)] for subset in self.transformation_subsets[1:]])
+
+        error_counts = self.grammar.count_phrase_errors_batch(string for strings in transformed for string in strings)
+        columns = len(self.transformation_subsets)
+
+        df = pd.DataFrame()
+        df['data'] = data
+        for column, function in enumerate(self.grammar_functions):
+            df[function.__name__] = error_counts[column::columns]
+
+        return df
+
     def predict(self, examples):
 
-        grammared = self.label_apply(examples, self.grammar_functions)
+        grammared = self.grammar_features(examples)
         del grammared['data']
 
         output = pd.DataFrame()
@@ -93,8 +129,8 @@ class BatchGrammarClassifier:
         else:
             model = GradientBoostingClassifier()
 
-        negatives = self.label_apply(negative_examples, self.grammar_functions)
-        positives = self.label_apply(positive_examples, self.grammar_functions)
+        negatives = self.grammar_features(negative_examples)
+        positives = self.grammar_features(positive_examples)
         examples = self.format_examples(negatives, positives)
 
         del examples['data']
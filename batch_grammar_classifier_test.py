@@ -1,11 +1,24 @@
 import unittest
 import pandas as pd
 from batch_grammar_classifier import BatchGrammarClassifier
+from grammar_object import Grammar
 import shutil
 import os
 
 # TODO: ensure prediction maintains order
 
+class SymbolCountingTool:
+    """
+        Grammar tool counting '@' and '#' characters as errors, recording the strings it checks.
+    """
+
+    def __init__(self):
+        self.checked = []
+
+    def check(self, string):
+        self.checked.append(string)
+        return ['error'] * (string.count('@') + 2 * string.count('#'))
+
 class TestBatchGrammarClassifier(unittest.TestCase):
 
     def test_power_set(self):
@@ -39,6 +52,24 @@ class TestBatchGrammarClassifier(unittest.TestCase):
 
         pd.testing.assert_frame_equal(expected_output, actual_output)
 
+    def test_grammar_features(self):
+        """
+            Verify that grammar features match label_apply over the grammar functions, checking each distinct transformed string once.
+        """
+        test_data = ['Thank you @realDonaldTrump #MAGA', 'No handles or hashtags', 'Thank you @realDonaldTrump #MAGA', '#MAGA']
+
+        reference_classifier = BatchGrammarClassifier('test', grammar=Grammar(tool_factory=SymbolCountingTool))
+        expected_output = reference_classifier.label_apply(test_data, reference_classifier.grammar_functions)
+
+        grammar = Grammar(tool_factory=SymbolCountingTool, pool_size=1)
+        actual_output = BatchGrammarClassifier('test', grammar=grammar).grammar_features(test_data)
+
+        pd.testing.assert_frame_equal(expected_output, actual_output)
+        self.assertEqual(len(grammar.tool.checked), len(set(grammar.tool.checked)))
+        self.assertEqual(set(grammar.tool.checked), {'Thank you @realDonaldTrump #MAGA', 'Thank you  #MAGA', 'Thank you @realDonaldTrump ', 'Thank you  ',
+                                                     'Thank you John #MAGA', 'Thank you John ', 'Thank you go #MAGA', 'Thank you go ',
+                                                     'No handles or hashtags', '#MAGA', ''})
+
     def test_constructor(self):
         test_batch_grammar_classifier = BatchGrammarClassifier('test')
 
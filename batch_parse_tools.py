@@ -0,0 +1,132 @@
+import re
+import numpy as np
+import pandas as pd
+from parse_tools import ParseTools
+
+class BatchParseTools:
+    """
+        Counterparts of ParseTools methods over many strings at once (lists, arrays or Series), built on
+        Series.str operations with precompiled patterns. Results are NumPy arrays, with an element equal to
+        the ParseTools method's result for each string.
+    """
+
+    twitter_name_re = re.compile(ParseTools.twitter_name_re)
+    twitter_ht_re = re.compile(ParseTools.twitter_ht_re)
+    twitter_link_re = re.compile(ParseTools.twitter_link_re)
+    twitter_pic_link_re = re.compile(ParseTools.twitter_pic_link_re)
+    apostrophe_re = re.compile(ParseTools.apostrophe_re)
+
+    # Equivalents of ParseTools string checks
+    dot_at_re = re.compile(r'\.@')
+    whitespace_re = re.compile(r'\s+')
+    outer_quotes_re = re.compile(r'\A(["\'])(.*)\1\Z', re.DOTALL)
+    proper_sentence_re = re.compile(r'[A-Z].*[.?!]', re.DOTALL)
+    quoted_tweet_start_re = re.compile(r'[\'"]@')
+    letter_re = re.compile('[a-z]')
+
+    @staticmethod
+    def as_series(strings):
+        if isinstance(strings, pd.Series):
+            return strings
+        return pd.Series(list(strings), dtype=object)
+
+    @staticmethod
+    def strings(series):
+        return series.to_numpy(dtype=object)
+
+    @staticmethod
+    def replace(strings, pattern, replacement):
+        return BatchParseTools.strings(BatchParseTools.as_series(strings).str.replace(pattern, replacement, regex=True))
+
+    @staticmethod
+    def remove_ats(strings):
+        return BatchParseTools.replace(strings, BatchParseTools.twitter_name_re, '')
+
+    @staticmethod
+    def replace_ats(strings, replacement):
+        return BatchParseTools.replace(strings, BatchParseTools.twitter_name_re, replacement)
+
+    @staticmethod
+    def remove_hts(strings):
+        return BatchParseTools.replace(strings, BatchParseTools.twitter_ht_re, '')
+
+    @staticmethod
+    def remove_http_links(strings):
+        return BatchParseTools.replace(strings, BatchParseTools.twitter_link_re, '')
+
+    @staticmethod
+    def remove_pic_links(strings):
+        return BatchParseTools.replace(strings, BatchParseTools.twitter_pic_link_re, '')
+
+    @staticmethod
+    def remove_dots(strings):
+        return BatchParseTools.strings(BatchParseTools.as_series(strings).str.replace("…", "", regex=False))
+
+    @staticmethod
+    def re_apostrophize(strings):
+        return BatchParseTools.strings(BatchParseTools.as_series(strings).str.replace(' s ', '\'s ', regex=False))
+
+    @staticmethod
+    def re_amp(strings):
+        return BatchParseTools.strings(BatchParseTools.as_series(strings).str.replace('&amp;', '&', regex=False))
+
+    @staticmethod
+    def split_join(strings):
+        series = BatchParseTools.as_series(strings)
+        return BatchParseTools.strings(series.str.replace(BatchParseTools.whitespace_re, ' ', regex=True).str.strip())
+
+    @staticmethod
+    def remove_outer_quotes(strings):
+        return BatchParseTools.replace(strings, BatchParseTools.outer_quotes_re, r'\2')
+
+    @staticmethod
+    def contains_letters(strings):
+        series = BatchParseTools.as_series(strings)
+        return series.str.lower().str.contains(BatchParseTools.letter_re, regex=True).to_numpy(dtype=bool)
+
+    @staticmethod
+    def is_proper_sentence(strings):
+        series = BatchParseTools.as_series(strings)
+        return series.str.fullmatch(BatchParseTools.proper_sentence_re).to_numpy(dtype=bool)
+
+    @staticmethod
+    def is_quoted_tweet(strings):
+        """
+            Strings whose handle is followed by nothing are not quoted tweets (ParseTools.is_quoted_tweet
+            raises IndexError for them).
+        """
+        series = BatchParseTools.as_series(strings)
+        quoted_start = series.str.match(BatchParseTools.quoted_tweet_start_re)
+        at_less = series.str.replace(BatchParseTools.twitter_name_re, '', regex=True)
+        return (quoted_start & (at_less.str[1] == ':')).to_numpy(dtype=bool)
+
+    @staticmethod
+    def count_ats(strings):
+        series = BatchParseTools.as_series(strings).str.replace(BatchParseTools.dot_at_re, '@', regex=True)
+        return series.str.count(BatchParseTools.twitter_name_re).to_numpy(dtype='int64')
+
+    @staticmethod
+    def count_hts(strings):
+        return BatchParseTools.as_series(strings).str.count(BatchParseTools.twitter_ht_re).to_numpy(dtype='int64')
+
+    @staticmethod
+    def count_http_links(strings):
+        return BatchParseTools.as_series(strings).str.count(BatchParseTools.twitter_link_re).to_numpy(dtype='int64')
+
+    @staticmethod
+    def extract_ats(strings):
+        series = BatchParseTools.as_series(strings).str.replace(BatchParseTools.dot_at_re, '@', regex=True)
+        return BatchParseTools.strings(series.str.findall(BatchParseTools.twitter_name_re).map(lambda ats: ['@' + at for at in ats]))
+
+    @staticmethod
+    def extract_hts(strings):
+        series = BatchParseTools.as_series(strings)
+        return BatchParseTools.strings(series.str.findall(BatchParseTools.twitter_ht_re).map(lambda hts: ['#' + ht for ht in hts]))
+
+    @staticmethod
+    def extract_http_links(strings):
+        return BatchParseTools.strings(BatchParseTools.as_series(strings).str.findall(BatchParseTools.twitter_link_re))
+
+    @staticmethod
+    def extract_apostrophe_words(strings):
+        return BatchParseTools.strings(BatchParseTools.as_series(strings).str.findall(BatchParseTools.apostrophe_re))
@@ -0,0 +1,52 @@
+import unittest
+import numpy as np
+import pandas as pd
+from batch_parse_tools import *
+
+class TestBatchParseTools(unittest.TestCase):
+
+    def setUp(self):
+        self.strings = [
+            "Great meeting with @realDonaldTrump today!",
+            ".@FoxNews is #1 http://t.co/0DlGChTBIx pic.twitter.com/UTYOLo7wGF",
+            "'@VeryOddDog: What's BRUTAL is a nation WITHOUT Trump!'",
+            '"Quoted"',
+            "Trump s plan &amp; more…",
+            "  extra   spaces\t",
+            "#MAGA",
+            "",
+            "1234"
+        ]
+
+    def assert_matches_parse_tools(self, name, *args):
+        """
+            Verify that the batch method gives the ParseTools method's result for every string.
+        """
+        expected = [getattr(ParseTools, name)(string, *args) for string in self.strings]
+        self.assertEqual(list(getattr(BatchParseTools, name)(self.strings, *args)), expected)
+
+    def test_replacements(self):
+        for name in ['remove_ats', 'remove_hts', 'remove_http_links', 'remove_pic_links', 'remove_dots', 're_apostrophize', 're_amp', 'split_join', 'remove_outer_quotes']:
+            self.assert_matches_parse_tools(name)
+        self.assert_matches_parse_tools('replace_ats', '@handle')
+
+    def test_predicates(self):
+        for name in ['contains_letters', 'is_proper_sentence', 'is_quoted_tweet']:
+            self.assert_matches_parse_tools(name)
+        self.assertEqual(BatchParseTools.is_proper_sentence(self.strings).dtype, np.bool_)
+
+    def test_extractions(self):
+        for name in ['count_ats', 'extract_ats', 'extract_hts', 'extract_http_links', 'extract_apostrophe_words']:
+            self.assert_matches_parse_tools(name)
+        self.assertEqual(list(BatchParseTools.count_hts(self.strings)), [len(ParseTools.extract_hts(string)) for string in self.strings])
+
+    def test_series_input(self):
+        series = pd.Series(self.strings, index=range(10, 10 + len(self.strings)))
+        np.testing.assert_array_equal(BatchParseTools.remove_ats(series), BatchParseTools.remove_ats(self.strings))
+
+    def test_empty_input(self):
+        self.assertEqual(BatchParseTools.remove_ats([]).shape, (0,))
+        self.assertEqual(BatchParseTools.contains_letters([]).shape, (0,))
+
+if __name__ == "__main__":
+    unittest.main()
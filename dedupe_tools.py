@@ -0,0 +1,105 @@
+"""
+    Tools for removing near-duplicate tweets before they are ranked and labelled.
+"""
+
+import zlib
+import numpy as np
+from collections import defaultdict
+from parse_tools import ParseTools
+
+class MinHashIndex:
+    """
+        Locality sensitive hashing index of MinHash signatures over word shingles.
+
+        Signatures of num_perm hashes are split into bands; texts sharing any band are compared, and
+        considered near-duplicates when their estimated Jaccard similarity reaches threshold.
+    """
+
+    # Mersenne prime for universal hashing, small enough that products fit in 64 bits
+    prime = (1 << 31) - 1
+
+    def __init__(self, threshold=.8, num_perm=64, bands=16, shingle_size=2, seed=0):
+
+        if num_perm % bands != 0:
+            raise ValueError('Number of permutations must be divisible by number of bands')
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        random_state = np.random.RandomState(seed)
+        self.a = random_state.randint(1, self.prime, size=num_perm).astype('int64')
+        self.b = random_state.randint(0, self.prime, size=num_perm).astype('int64')
+
+        self.signatures = dict()
+        self.buckets = [defaultdict(list) for _ in range(bands)]
+
+    def shingles(self, text):
+        """
+            Returns set of word shingles (case insensitive) of the text.
+        """
+        words = [word.lower() for word in ParseTools.extract_words(text)]
+
+        # Texts too short for a full shingle are a single shingle
+        if len(words) < self.shingle_size:
+            return {' '.join(words) if words else text}
+
+        return {' '.join(words[start:start + self.shingle_size]) for start in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text):
+        shingle_hashes = np.array([zlib.crc32(shingle.encode('utf8')) % self.prime for shingle in self.shingles(text)], dtype='int64')
+        return np.min((np.outer(shingle_hashes, self.a) + self.b) % self.prime, axis=0)
+
+    def band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def add(self, key, text):
+        self.add_signature(key, self.signature(text))
+
+    def add_signature(self, key, signature):
+        """
+            Index a signature already computed (by this index, or one built with the same parameters).
+        """
+        self.signatures[key] = signature
+        for bucket, band_key in zip(self.buckets, self.band_keys(signature)):
+            bucket[band_key].append(key)
+
+    def query(self, text):
+        """
+            Returns keys of indexed texts that are near-duplicates of text.
+        """
+        return self.query_signature(self.signature(text))
+
+    def query_signature(self, signature):
+        """
+            Returns keys of indexed texts whose signatures are near-duplicates of signature.
+        """
+        candidates = set()
+        for bucket, band_key in zip(self.buckets, self.band_keys(signature)):
+            candidates.update(bucket.get(band_key, ()))
+
+        return [key for key in candidates if np.mean(self.signatures[key] == signature) >= self.threshold]
+
+def remove_near_duplicates(candidates, corpus=(), threshold=.8, **index_kwargs):
+    """
+        Returns candidates without near-duplicates, keeping the first of each group of similar
+        candidates and dropping candidates similar to any text in corpus (ie. the training tweets).
+    """
+    corpus_index = MinHashIndex(threshold, **index_kwargs)
+    for key, text in enumerate(corpus):
+        corpus_index.add(key, text)
+
+    candidate_index = MinHashIndex(threshold, **index_kwargs)
+    kept = []
+    for key, candidate in enumerate(candidates):
+
+        # Both indexes share their parameters, so one signature serves every lookup
+        signature = candidate_index.signature(candidate)
+        if corpus_index.query_signature(signature) or candidate_index.query_signature(signature):
+            continue
+        candidate_index.add_signature(key, signature)
+        kept.append(candidate)
+
+    return kept
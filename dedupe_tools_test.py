@@ -0,0 +1,70 @@
+import unittest
+from dedupe_tools import *
+
+class TestDedupeTools(unittest.TestCase):
+
+    def test_shingles(self):
+        index = MinHashIndex(shingle_size=2)
+        self.assertEqual(index.shingles('The globe is FAKE'), {'the globe', 'globe is', 'is fake'})
+        self.assertEqual(index.shingles('Thanks!'), {'thanks'})
+        self.assertEqual(index.shingles('!!!'), {'!!!'})
+
+    def test_query(self):
+        """
+            Verify that identical and near-identical texts are found, and dissimilar texts are not.
+        """
+        index = MinHashIndex(threshold=.5)
+        index.add('a', 'The globe is a lie told by NASA and the fake news media every single day')
+        index.add('b', 'Make America great again')
+
+        self.assertEqual(index.query('The globe is a lie told by NASA and the fake news media every single day!'), ['a'])
+        self.assertEqual(index.query('the globe is a lie told by NASA and the fake news media every day'), ['a'])
+        self.assertEqual(index.query('I will be interviewed tonight at 9'), [])
+
+    def test_invalid_bands(self):
+        with self.assertRaises(ValueError):
+            MinHashIndex(num_perm=10, bands=3)
+
+    def test_remove_near_duplicates(self):
+        candidates = [
+            'Thank you North Carolina, we will win big!',
+            'Thank you North Carolina, we will win big!!',
+            'The earth is flat and everybody knows it.',
+            'Fake news is the enemy of the people.'
+        ]
+        corpus = ['The Earth is flat and everybody knows it!']
+
+        self.assertEqual(remove_near_duplicates(candidates, corpus), [candidates[0], candidates[3]])
+        self.assertEqual(remove_near_duplicates(candidates), [candidates[0], candidates[2], candidates[3]])
+        self.assertEqual(remove_near_duplicates([]), [])
+
+    def test_remove_near_duplicates_signs_once(self):
+        """
+            Verify that the signature of each candidate is computed only once.
+        """
+        signed = []
+        signature = MinHashIndex.signature
+
+        def counting_signature(index, text):
+            signed.append(text)
+            return signature(index, text)
+
+        candidates = ['Fake news is the enemy of the people.', 'Make America great again', 'Fake news is the enemy of the people!']
+        MinHashIndex.signature = counting_signature
+        try:
+            kept = remove_near_duplicates(candidates, ['I will be interviewed tonight at 9'])
+        finally:
+            MinHashIndex.signature = signature
+
+        self.assertEqual(kept, candidates[:2])
+        self.assertEqual(signed, ['I will be interviewed tonight at 9'] + candidates)
+
+    def test_query_signature(self):
+        index = MinHashIndex(threshold=.5)
+        signature = index.signature('Make America great again')
+        index.add_signature('a', signature)
+        self.assertEqual(index.query_signature(signature), ['a'])
+        self.assertEqual(index.query('Make America great again'), ['a'])
+
+if __name__ == "__main__":
+    unittest.main()
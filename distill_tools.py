@@ -0,0 +1,98 @@
+"""
+    Tools for distilling the textgenrnn model into a smaller student model for fast candidate generation.
+
+    Students keep the layer names of textgenrnn models, so their saved weights can be loaded with
+    NumpyTextgenrnn (using the teacher's vocab) and passed to tweet_generation.generate like any other model.
+"""
+
+import time
+import numpy as np
+import pandas as pd
+from numpy_textgenrnn import encode_sequence
+from tweet_generation import generate
+
+def distillation_data(teacher, texts, maxlen=40, chunk_size=1024):
+    """
+        Encode every window of texts, as done in textgenrnn training, along with the teacher's next
+        character probabilities for each window as soft targets.
+    """
+    meta_token = '<s>'
+
+    windows = []
+    for text in texts:
+        chars = [meta_token] + list(text)
+        for end in range(1, len(chars) + 1):
+            windows.append(encode_sequence(chars[:end], teacher.vocab, maxlen))
+
+    if not windows:
+        return np.zeros((0, maxlen), dtype='int32'), np.zeros((0, len(teacher.vocab) + 1))
+
+    X = np.concatenate(windows)
+
+    # Predict in chunks to bound memory
+    y = np.concatenate([teacher.model.predict(X[start:start + chunk_size], batch_size=chunk_size)
+                        for start in range(0, X.shape[0], chunk_size)])
+
+    return X, y
+
+def build_student_model(num_classes, dim_embeddings=32, rnn_size=64, maxlen=40):
+    """
+        Builds a textgenrnn-style model with smaller embeddings and LSTM.
+    """
+    from keras.layers import Input, Embedding, Dense, LSTM
+    from keras.models import Model
+
+    input = Input(shape=(maxlen,), name='input')
+    embedded = Embedding(num_classes, dim_embeddings, input_length=maxlen, name='embedding')(input)
+
+    # Recurrent activation is fixed so the weights stay compatible with NumpyTextgenrnn
+    rnn = LSTM(rnn_size, recurrent_activation='hard_sigmoid', name='rnn')(embedded)
+    output = Dense(num_classes, activation='softmax', name='output')(rnn)
+
+    model = Model(inputs=[input], outputs=[output])
+
+    # Cross entropy against soft targets differs from the KL divergence to the teacher by a constant
+    model.compile(loss='categorical_crossentropy', optimizer='nadam')
+    return model
+
+def train_student(teacher, texts, weights_path, dim_embeddings=32, rnn_size=64, epochs=10, batch_size=128, verbose=1):
+    """
+        Train a student model to match the teacher's predictions over texts (ie. texts generated by the
+        teacher), and save its weights. CPU training is sufficient for student sized models.
+    """
+    X, y = distillation_data(teacher, texts)
+
+    student = build_student_model(y.shape[1], dim_embeddings, rnn_size, X.shape[1])
+    student.fit(X, y, batch_size=batch_size, epochs=epochs, verbose=verbose)
+    student.save_weights(weights_path)
+
+    return student
+
+def benchmark_generators(generators, gen_count, temperature, grammar_classifier=None, **generate_kwargs):
+    """
+        Compare generation speed (accepted tweets per second) of models, and the quality of their
+        tweets (mean summed score of the grammar classifier's models) if a classifier is passed.
+
+        generators maps names to models that can be passed to tweet_generation.generate.
+    """
+    rows = []
+    for name in generators:
+        start_time = time.time()
+        tweets = generate(generators[name], gen_count, temperature, **generate_kwargs)
+        elapsed = time.time() - start_time
+
+        row = {
+            'generator': name,
+            'tweets': len(tweets),
+            'seconds': elapsed,
+            'tweets_per_second': len(tweets) / elapsed if elapsed > 0 else float('inf')
+        }
+
+        if grammar_classifier is not None:
+            scores = grammar_classifier.predict(tweets)
+            del scores['example']
+            row['mean_score'] = scores.sum(axis=1).mean() if len(tweets) else float('nan')
+
+        rows.append(row)
+
+    return pd.DataFrame(rows).set_index('generator')
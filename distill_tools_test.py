@@ -0,0 +1,67 @@
+import unittest
+import numpy as np
+import pandas as pd
+from distill_tools import *
+
+class UniformModel:
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, x, batch_size=None):
+        self.calls += 1
+        preds = np.zeros((x.shape[0], 4))
+        preds[:, 1:] = 1 / 3
+        return preds
+
+class StoppingTextgenrnn:
+    """
+        Model that always predicts the meta token straight after 'a'.
+    """
+
+    def __init__(self):
+        self.vocab = {'a': 1, 'b': 2, '<s>': 3}
+        self.indices_char = dict((self.vocab[c], c) for c in self.vocab)
+        self.model = self
+
+    def predict(self, x, batch_size=None):
+        preds = np.zeros((x.shape[0], 4))
+        preds[:, 1] = x[:, -1] == 3
+        preds[:, 3] = x[:, -1] != 3
+        return preds
+
+class ConstantClassifier:
+
+    def predict(self, examples):
+        return pd.DataFrame({'example': examples, 'first': np.ones(len(examples)), 'second': np.full(len(examples), 2)})
+
+class TestDistillTools(unittest.TestCase):
+
+    def test_distillation_data(self):
+        """
+            Verify that every window of every text is encoded, with the teacher's predictions as targets.
+        """
+        teacher = StoppingTextgenrnn()
+        teacher.model = UniformModel()
+
+        X, y = distillation_data(teacher, ['ab', 'b'], maxlen=3, chunk_size=2)
+
+        expected_X = np.array([[0, 0, 3], [0, 3, 1], [3, 1, 2], [0, 0, 3], [0, 3, 2]])
+        np.testing.assert_array_equal(X, expected_X)
+        np.testing.assert_allclose(y, np.tile([0, 1 / 3, 1 / 3, 1 / 3], (5, 1)))
+        self.assertEqual(teacher.model.calls, 3)
+
+    def test_distillation_data_no_texts(self):
+        X, y = distillation_data(StoppingTextgenrnn(), [], maxlen=3)
+        self.assertEqual((X.shape, y.shape), ((0, 3), (0, 4)))
+
+    def test_benchmark_generators(self):
+        benchmark = benchmark_generators({'teacher': StoppingTextgenrnn(), 'student': StoppingTextgenrnn()}, 5, .2,
+                                         grammar_classifier=ConstantClassifier(), batch_size=2)
+        self.assertEqual(list(benchmark.index), ['teacher', 'student'])
+        self.assertEqual(list(benchmark['tweets']), [5, 5])
+        self.assertEqual(list(benchmark['mean_score']), [3, 3])
+        self.assertTrue(all(benchmark['tweets_per_second'] > 0))
+
+if __name__ == "__main__":
+    unittest.main()
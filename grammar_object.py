@@ -1,26 +1,62 @@
+import os
 import json
-import language_check
+import queue
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from parse_tools import ParseTools
+from phrase_cache import SqlitePhraseCache
 
+def language_tool():
+    import language_check
+    return language_check.LanguageTool('en-US')
 
 class Grammar:
 
-    def __init__(self, phrase_cache_path=None):
+    def __init__(self, phrase_cache_path=None, tool_factory=language_tool, pool_size=4, phrase_cache=None, sentence_level=False):
+        """
+            tool_factory creates grammar checking tools (objects with a check method returning a list of
+            errors), pool_size of which may be used at once by count_phrase_errors_batch.
+
+            phrase_cache may be any mapping of phrases to error counts (ie. SqlitePhraseCache). Phrase cache
+            paths ending in .db or .sqlite are opened as SqlitePhraseCache, others are read as JSON.
+
+            With sentence_level, strings of several sentences are counted as the sum of their sentences'
+            errors, so that sentences shared between strings are only checked once (see sentence_level_report).
+        """
 
-        if phrase_cache_path is None:
+        if phrase_cache is not None:
+            self.phrase_cache = phrase_cache
+        elif phrase_cache_path is None:
             self.phrase_cache = dict()
+        elif os.path.splitext(phrase_cache_path)[1] in {'.db', '.sqlite'}:
+            self.phrase_cache = SqlitePhraseCache(phrase_cache_path)
         else:
             self.phrase_cache = self.load_phrase_cache(phrase_cache_path)
 
-        self.tool = language_check.LanguageTool('en-US')
+        self.tool_factory = tool_factory
+        self.pool_size = pool_size
+        self.sentence_level = sentence_level
+        self.tool = tool_factory()
+        self.tools = [self.tool]
+
+        # Phrase cache statistics
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.check_seconds = 0.0
+        self.stats_lock = threading.Lock()
 
     def write_phrase_cache(self, phrase_cache_path):
         """
             Wite phrase cache to json file.
         """
 
+        # Caches keyed by digests (ie. BoundedPhraseCache) no longer hold the phrases
+        if not getattr(self.phrase_cache, 'stores_phrases', True):
+            raise ValueError('Phrase cache does not store phrases, so it cannot be written to json')
+
         # Dump dictionary to json
-        dumped = json.dumps(self.phrase_cache)
+        dumped = json.dumps(dict(self.phrase_cache))
 
         # Write json to file
         with open(phrase_cache_path, "w") as text_file:
@@ -54,14 +90,135 @@ class Grammar:
 
             Results of check are cached, and will be attempted to be read before check is made.
         """
-        if string in self.phrase_cache:
-            return self.phrase_cache[string]
+        if self.sentence_level:
+            return sum(self.count_whole_phrase_errors(phrase) for phrase in self.split_sentences(string))
+
+        return self.count_whole_phrase_errors(string)
 
-        grammar_tool_result = len(self.tool.check(string))
+    @staticmethod
+    def split_sentences(string):
+        """
+            Returns sentences of string, or the string itself when it is a single sentence.
+        """
+        sentences = ParseTools.extract_sentences(string)
+        return sentences if len(sentences) > 1 else [string]
+
+    def count_whole_phrase_errors(self, string):
+        cached_result = self.phrase_cache.get(string)
+        if cached_result is not None:
+            self.cache_hits += 1
+            return cached_result
+
+        grammar_tool_result = self.timed_check(self.tool, string)
         self.phrase_cache[string] = grammar_tool_result
+        self.cache_misses += 1
 
         return grammar_tool_result
 
+    def timed_check(self, tool, string):
+        start_time = time.perf_counter()
+        error_count = len(tool.check(string))
+        with self.stats_lock:
+            self.check_seconds += time.perf_counter() - start_time
+        return error_count
+
+    def count_phrase_errors_batch(self, strings):
+        """
+            Returns the number of errors of each string, as count_phrase_errors would, in input order.
+
+            Each distinct string (or sentence) missing from the phrase cache is checked once, with checks
+            spread over a pool of tools run from threads (LanguageTool checks are requests to its local
+            server, so they run concurrently).
+        """
+        strings = list(strings)
+        if not self.sentence_level:
+            return self.count_whole_phrase_errors_batch(strings)
+
+        return self.count_split_phrase_errors_batch([self.split_sentences(string) for string in strings])
+
+    def count_split_phrase_errors_batch(self, string_phrases):
+        """
+            Returns the summed number of errors of the phrases of each string.
+        """
+        phrase_counts = iter(self.count_whole_phrase_errors_batch(phrase for phrases in string_phrases for phrase in phrases))
+        return [sum(next(phrase_counts) for _ in phrases) for phrases in string_phrases]
+
+    def count_whole_phrase_errors_batch(self, strings):
+        strings = list(strings)
+
+        # Read cached counts before adding new ones, which may evict them from a bounded cache
+        error_counts = dict()
+        misses = []
+        for string in dict.fromkeys(strings):
+            cached_result = self.phrase_cache.get(string)
+            if cached_result is None:
+                misses.append(string)
+            else:
+                error_counts[string] = cached_result
+
+        if misses:
+            while len(self.tools) < min(self.pool_size, len(misses)):
+                self.tools.append(self.tool_factory())
+
+            # Each tool is only used by one thread at a time
+            idle_tools = queue.Queue()
+            for tool in self.tools:
+                idle_tools.put(tool)
+
+            def check(string):
+                tool = idle_tools.get()
+                try:
+                    return self.timed_check(tool, string)
+                finally:
+                    idle_tools.put(tool)
+
+            with ThreadPoolExecutor(max_workers=len(self.tools)) as executor:
+                checked_counts = dict(zip(misses, executor.map(check, misses)))
+
+            self.phrase_cache.update(checked_counts)
+            error_counts.update(checked_counts)
+
+        self.cache_misses += len(misses)
+        self.cache_hits += len(strings) - len(misses)
+
+        return [error_counts[string] for string in strings]
+
+    def cache_stats(self):
+        """
+            Returns phrase cache hits and misses (checks made), evictions (for bounded caches) and the
+            estimated seconds saved by hits, at the mean time of a check.
+        """
+        mean_check_seconds = self.check_seconds / self.cache_misses if self.cache_misses else 0.0
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'evictions': getattr(self.phrase_cache, 'evictions', 0),
+            'seconds_saved': self.cache_hits * mean_check_seconds
+        }
+
+    def sentence_level_report(self, strings):
+        """
+            Compare sentence level counts of strings with whole string counts (checking strings as needed),
+            returning how many strings were split into sentences, how many counts differ, and the mean
+            absolute difference.
+        """
+        strings = list(strings)
+        string_phrases = [self.split_sentences(string) for string in strings]
+
+        whole_counts = self.count_whole_phrase_errors_batch(strings)
+        sentence_counts = self.count_split_phrase_errors_batch(string_phrases)
+
+        differences = [abs(whole_count - sentence_count) for whole_count, sentence_count in zip(whole_counts, sentence_counts)]
+        differing = sum(difference > 0 for difference in differences)
+
+        return {
+            'strings': len(strings),
+            'split': sum(len(phrases) > 1 for phrases in string_phrases),
+            'differing': differing,
+            'differing_rate': differing / len(strings) if strings else 0.0,
+            'mean_absolute_difference': sum(differences) / len(strings) if strings else 0.0
+        }
+
     # TODO:
     # - Consider verifying that path passed is phrase cache (keys are strings, values are integers, etc.)
     @staticmethod
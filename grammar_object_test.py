@@ -1,13 +1,29 @@
 from grammar_object import Grammar
+from phrase_cache import BoundedPhraseCache
 import json
 import unittest
 import os
 import time
+import threading
 from parse_tools import ParseTools
 
 # TODO:
 # - Test changes to get_avg_error_func
 
+class StandInTool:
+    """
+        Grammar tool counting '*' characters as errors, recording the strings it checks.
+    """
+
+    checked = []
+    lock = threading.Lock()
+
+    def check(self, string):
+        with StandInTool.lock:
+            StandInTool.checked.append(string)
+        time.sleep(.01)
+        return ['error'] * string.count('*')
+
 class TestGrammar(unittest.TestCase):
 
     def setUp(self):
@@ -65,5 +81,99 @@ class TestGrammar(unittest.TestCase):
         actual_loaded_phrase_cache = Grammar.load_phrase_cache('sample_phrase_cache.json')
         self.assertEqual(expected_loaded_phrase_cache, actual_loaded_phrase_cache)
 
+    def test_count_phrase_errors_batch(self):
+        """
+            Verify that batch counts are returned in input order, checking each uncached string once.
+        """
+        StandInTool.checked = []
+        test_grammar = Grammar('sample_phrase_cache.json', tool_factory=StandInTool, pool_size=3)
+        strings = ['One *', 'Two **', 'One *', 'Sample phrase', 'None', 'Two **']
+
+        self.assertEqual(test_grammar.count_phrase_errors_batch(strings), [1, 2, 1, 0, 0, 2])
+        self.assertEqual(sorted(StandInTool.checked), ['None', 'One *', 'Two **'])
+        self.assertEqual(len(test_grammar.tools), 3)
+
+        self.assertEqual(test_grammar.count_phrase_errors_batch(['Two **', 'Another sample phrase']), [2, 2])
+        self.assertEqual(len(StandInTool.checked), 3)
+
+    def test_count_phrase_errors_batch_matches_count_phrase_errors(self):
+        strings = ['*' * count for count in range(20)]
+        batch_grammar = Grammar(tool_factory=StandInTool)
+        single_grammar = Grammar(tool_factory=StandInTool)
+        self.assertEqual(batch_grammar.count_phrase_errors_batch(strings), [single_grammar.count_phrase_errors(string) for string in strings])
+        self.assertEqual(batch_grammar.phrase_cache, single_grammar.phrase_cache)
+
+    def test_cache_stats(self):
+        """
+            Verify that hits, misses and evictions are counted with a bounded phrase cache.
+        """
+        test_grammar = Grammar(tool_factory=StandInTool, phrase_cache=BoundedPhraseCache(max_entries=2))
+        self.assertEqual(test_grammar.count_phrase_errors_batch(['One *', 'Two **', 'One *', 'None']), [1, 2, 1, 0])
+        self.assertEqual(test_grammar.count_phrase_errors('None'), 0)
+        self.assertEqual(test_grammar.count_phrase_errors('One *'), 1)
+
+        stats = test_grammar.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions']), (2, 4, 2))
+        self.assertGreater(stats['seconds_saved'], 0)
+
+    def test_write_bounded_phrase_cache(self):
+        """
+            Verify that a bounded phrase cache, which only holds digests of phrases, is not written to json.
+        """
+        test_grammar = Grammar(tool_factory=StandInTool, phrase_cache=BoundedPhraseCache(max_entries=3))
+        test_grammar.count_phrase_errors_batch(['One *', 'Two **'])
+
+        self.assertEqual(sorted(count for _, count in test_grammar.phrase_cache.items()), [1, 2])
+        with self.assertRaises(ValueError):
+            test_grammar.write_phrase_cache('sample_written_phrase_cache.json')
+        self.assertFalse(os.path.exists('sample_written_phrase_cache.json'))
+
+    def test_write_phrase_cache(self):
+        test_grammar = Grammar(tool_factory=StandInTool)
+        test_grammar.count_phrase_errors_batch(['One *', 'Two **'])
+        try:
+            test_grammar.write_phrase_cache('sample_written_phrase_cache.json')
+            self.assertEqual(Grammar.load_phrase_cache('sample_written_phrase_cache.json'), {'One *': 1, 'Two **': 2})
+        finally:
+            os.remove('sample_written_phrase_cache.json')
+
+    def test_cache_stats_default_cache(self):
+        test_grammar = Grammar(tool_factory=StandInTool)
+        self.assertEqual(test_grammar.phrase_cache, dict())
+        self.assertEqual(test_grammar.cache_stats(), {'hits': 0, 'misses': 0, 'evictions': 0, 'seconds_saved': 0.0})
+
+    def test_sentence_level(self):
+        """
+            Verify that sentence level counts sum the errors of each sentence, checking shared sentences once.
+        """
+        StandInTool.checked = []
+        test_grammar = Grammar(tool_factory=StandInTool, sentence_level=True)
+        strings = ['First sentence *. Second sentence **.', 'Other sentence. Second sentence **.', 'Single sentence *.']
+
+        self.assertEqual(test_grammar.count_phrase_errors_batch(strings), [3, 2, 1])
+        self.assertEqual(sorted(StandInTool.checked), ['First sentence *.', 'Other sentence.', 'Second sentence **.', 'Single sentence *.'])
+        self.assertEqual(test_grammar.count_phrase_errors('Other sentence. Single sentence *.'), 1)
+        self.assertEqual(len(StandInTool.checked), 4)
+
+    def test_sentence_level_report(self):
+        test_grammar = Grammar(tool_factory=StandInTool)
+        report = test_grammar.sentence_level_report(['First sentence *. Second sentence **.', 'Single sentence *.'])
+        self.assertEqual(report, {'strings': 2, 'split': 1, 'differing': 0, 'differing_rate': 0.0, 'mean_absolute_difference': 0.0})
+        self.assertFalse(test_grammar.sentence_level)
+
+    def test_sqlite_phrase_cache(self):
+        """
+            Verify that phrase cache paths with a database extension use an SQLite phrase cache.
+        """
+        test_grammar = Grammar('sample_phrase_cache.db', tool_factory=StandInTool)
+        try:
+            self.assertEqual(test_grammar.count_phrase_errors_batch(['One *', 'Two **']), [1, 2])
+            self.assertEqual(Grammar('sample_phrase_cache.db', tool_factory=StandInTool).phrase_cache['Two **'], 2)
+        finally:
+            test_grammar.phrase_cache.close()
+            for suffix in ['', '-wal', '-shm']:
+                if os.path.exists('sample_phrase_cache.db' + suffix):
+                    os.remove('sample_phrase_cache.db' + suffix)
+
 if __name__ == "__main__":
     unittest.main()
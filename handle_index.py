@@ -0,0 +1,153 @@
+"""
+    Index of twitter handles for finding the handle nearest to a misspelled one (ie. as generated by the model).
+"""
+
+import os
+import numpy as np
+import pandas as pd
+from bisect import bisect_left
+from difflib import SequenceMatcher
+
+class HandleIndex:
+    """
+        Finds the same nearest handle as ParseTools.find_nearest_string over the handles, without scoring
+        every handle.
+
+        SequenceMatcher.ratio() is at most 2 * (characters in common) / (total length), so handles are scored
+        in order of that bound (computed for every handle at once from character counts), stopping once no
+        remaining handle can score as high as the best found. Ties go to the handle first in iteration order.
+    """
+
+    def __init__(self, handles):
+        self.handles = list(handles)
+        self.handle_set = set(self.handles)
+        self.resolved = dict()
+
+        self.char_columns = dict()
+        for handle in self.handles:
+            for char in handle:
+                self.char_columns.setdefault(char, len(self.char_columns))
+
+        self.char_counts = np.zeros((len(self.handles), len(self.char_columns)), dtype='int32')
+        for row, handle in enumerate(self.handles):
+            for char in handle:
+                self.char_counts[row, self.char_columns[char]] += 1
+
+        self.lengths = np.array([len(handle) for handle in self.handles], dtype='int64')
+
+    def __len__(self):
+        return len(self.handles)
+
+    def __contains__(self, handle):
+        return handle in self.handle_set
+
+    def __iter__(self):
+        return iter(self.handles)
+
+    def score_bounds(self, string):
+        """
+            Returns upper bound of SequenceMatcher(None, handle, string).ratio() for every handle.
+        """
+        query_counts = np.zeros(len(self.char_columns), dtype='int32')
+        for char in string:
+            if char in self.char_columns:
+                query_counts[self.char_columns[char]] += 1
+
+        common = np.minimum(self.char_counts, query_counts).sum(axis=1)
+        total = self.lengths + len(string)
+
+        # Same expression as difflib's ratio, so that bounds equal scores exactly when reached
+        return np.where(total > 0, 2.0 * common / np.maximum(total, 1), 1.0)
+
+    def find_nearest(self, string):
+        """
+            Find handle most near string passed.
+        """
+        if string in self.handle_set:
+            return string
+
+        if string not in self.resolved:
+            self.resolved[string] = self.search(string)
+        return self.resolved[string]
+
+    def search(self, string):
+
+        bounds = self.score_bounds(string)
+
+        # Descending bound, then iteration order
+        order = np.lexsort((np.arange(len(self.handles)), -bounds))
+
+        nearest_row = None
+        nearest_score = -1
+        for row in order:
+            if bounds[row] < nearest_score:
+                break
+            score = SequenceMatcher(None, self.handles[row], string).ratio()
+            if score > nearest_score or (score == nearest_score and row < nearest_row):
+                nearest_row = row
+                nearest_score = score
+
+        return None if nearest_row is None else self.handles[nearest_row]
+
+class HandleDictionary:
+    """
+        Sorted handles, stored on disk as one handle per line so they can be loaded without pandas.
+    """
+
+    def __init__(self, handles):
+        self.handles = sorted(set(handles))
+
+    @staticmethod
+    def load(path):
+        with open(path, encoding='utf8') as handles_file:
+            return HandleDictionary(handles_file.read().split())
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf8') as handles_file:
+            handles_file.write('\n'.join(self.handles))
+
+    def __len__(self):
+        return len(self.handles)
+
+    def __iter__(self):
+        return iter(self.handles)
+
+    def __contains__(self, handle):
+        position = bisect_left(self.handles, handle)
+        return position < len(self.handles) and self.handles[position] == handle
+
+    def with_prefix(self, prefix):
+        """
+            Returns handles starting with prefix, in sorted order.
+        """
+        start = bisect_left(self.handles, prefix)
+        end = start
+        while end < len(self.handles) and self.handles[end].startswith(prefix):
+            end += 1
+        return self.handles[start:end]
+
+# Handle dictionaries and indexes loaded by this process, by path
+handle_dictionaries = dict()
+handle_indexes = dict()
+
+def load_handle_dictionary(path='Data/ats.txt', pickle_path='Data/ats'):
+    """
+        Load handles from path, converting the pickled handle DataFrame at pickle_path when path is missing.
+        Dictionaries are only loaded once per process.
+    """
+    if path not in handle_dictionaries:
+        if not os.path.exists(path):
+            HandleDictionary(pd.read_pickle(pickle_path)['ats']).save(path)
+        handle_dictionaries[path] = HandleDictionary.load(path)
+
+    return handle_dictionaries[path]
+
+def load_handle_index(path='Data/ats.txt', pickle_path='Data/ats'):
+    """
+        Returns HandleIndex over the handle dictionary at path, shared (along with its memo of resolved
+        handles) by every call in this process.
+    """
+    if path not in handle_indexes:
+        handle_indexes[path] = HandleIndex(load_handle_dictionary(path, pickle_path))
+
+    return handle_indexes[path]
@@ -0,0 +1,77 @@
+import unittest
+import random
+import os
+from handle_index import *
+from parse_tools import ParseTools
+
+class TestHandleIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.handles = {'@realDonaldTrump', '@FoxNews', '@foxandfriends', '@nytimes', '@CNN', '@IvankaTrump', '@DonaldJTrumpJr', '@seanhannity'}
+        self.index = HandleIndex(self.handles)
+
+    def test_find_nearest_known_handle(self):
+        self.assertEqual(self.index.find_nearest('@FoxNews'), '@FoxNews')
+
+    def test_find_nearest_matches_find_nearest_string(self):
+        """
+            Verify that the index finds the same handle as scoring every handle.
+        """
+        random_state = random.Random(0)
+        for _ in range(200):
+            handle = list(random_state.choice(sorted(self.handles)))
+            for _ in range(random_state.randint(1, 4)):
+                handle[random_state.randrange(1, len(handle))] = random_state.choice('aeiouTrmpx_1')
+            handle = ''.join(handle)
+            self.assertEqual(self.index.find_nearest(handle), ParseTools.find_nearest_string(handle, self.handles))
+
+    def test_find_nearest_ties(self):
+        """
+            Verify that ties go to the handle first in iteration order.
+        """
+        self.assertEqual(HandleIndex(['@ab', '@ba']).find_nearest('@aa'), '@ab')
+        self.assertEqual(HandleIndex(['@ba', '@ab']).find_nearest('@aa'), '@ba')
+        self.assertEqual(HandleIndex(['@xy', '@zw']).find_nearest('#'), '@xy')
+
+    def test_find_nearest_memoized(self):
+        self.index.find_nearest('@realDonaldTrmp')
+        self.assertEqual(self.index.resolved, {'@realDonaldTrmp': '@realDonaldTrump'})
+
+    def test_find_nearest_empty_index(self):
+        self.assertIsNone(HandleIndex([]).find_nearest('@realDonaldTrump'))
+
+    def test_fix_ats_with_index(self):
+        self.assertEqual(ParseTools.fix_ats('Thank you @realDonaldTrmp and @FoxNwes!', self.index), 'Thank you @realDonaldTrump and @FoxNews!')
+
+class TestHandleDictionary(unittest.TestCase):
+
+    def setUp(self):
+        self.dictionary = HandleDictionary(['@FoxNews', '@CNN', '@FoxBusiness', '@foxandfriends', '@CNN'])
+
+    def tearDown(self):
+        if os.path.exists('sample_ats.txt'):
+            os.remove('sample_ats.txt')
+
+    def test_contains(self):
+        self.assertIn('@CNN', self.dictionary)
+        self.assertNotIn('@CN', self.dictionary)
+        self.assertNotIn('@foxandfriendz', self.dictionary)
+        self.assertEqual(len(self.dictionary), 4)
+
+    def test_with_prefix(self):
+        self.assertEqual(self.dictionary.with_prefix('@Fox'), ['@FoxBusiness', '@FoxNews'])
+        self.assertEqual(self.dictionary.with_prefix('@NBC'), [])
+
+    def test_save_load(self):
+        self.dictionary.save('sample_ats.txt')
+        self.assertEqual(list(HandleDictionary.load('sample_ats.txt')), list(self.dictionary))
+
+    def test_load_handle_dictionary_cached(self):
+        self.dictionary.save('sample_ats.txt')
+        dictionary = load_handle_dictionary('sample_ats.txt')
+        self.assertIs(load_handle_dictionary('sample_ats.txt'), dictionary)
+        self.assertEqual(load_handle_index('sample_ats.txt').find_nearest('@FoxNwes'), '@FoxNews')
+        self.assertIs(load_handle_index('sample_ats.txt'), load_handle_index('sample_ats.txt'))
+
+if __name__ == "__main__":
+    unittest.main()
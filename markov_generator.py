@@ -0,0 +1,129 @@
+import numpy as np
+from collections import Counter
+from parse_tools import ParseTools
+from stat_tools import alias_table
+
+class MarkovGenerator:
+    """
+        Order-k Markov chain over characters (or words) for cheap bulk generation of tweet-like strings,
+        ie. for stress testing, or as negative examples when training grammar classifiers.
+
+        Transition tables are stored as flat arrays, with an alias table per state, so that many strings
+        can be sampled together with one vectorized step per token.
+    """
+
+    # Reserved token ids
+    start_id = 0
+    end_id = 1
+
+    def __init__(self, order=3, word_level=False):
+        self.order = order
+        self.word_level = word_level
+
+    def tokenize(self, text):
+        if self.word_level:
+            return ParseTools.extract_words(text)
+        return list(text)
+
+    def fit(self, texts):
+        """
+            Count transitions from every state (last order tokens) in the texts.
+        """
+        token_ids = dict()
+        self.vocabulary = ['', '']
+
+        transitions = dict()
+        for text in texts:
+            ids = [self.start_id] * self.order
+            for token in self.tokenize(text):
+                if token not in token_ids:
+                    token_ids[token] = len(self.vocabulary)
+                    self.vocabulary.append(token)
+                ids.append(token_ids[token])
+            ids.append(self.end_id)
+
+            for end in range(self.order, len(ids)):
+                state = tuple(ids[end - self.order:end])
+                if state not in transitions:
+                    transitions[state] = Counter()
+                transitions[state][ids[end]] += 1
+
+        states = sorted(transitions)
+        state_ids = dict((state, state_id) for state_id, state in enumerate(states))
+
+        self.offsets = np.zeros(len(states), dtype='int64')
+        self.counts = np.zeros(len(states), dtype='int64')
+        tokens, alias_tokens, acceptances = [], [], []
+
+        for state_id, state in enumerate(states):
+
+            # Distribution of next tokens, as in stat_tools.element_distribution
+            counter = transitions[state]
+            total = sum(counter.values())
+            next_tokens = sorted(counter)
+            acceptance, alias = alias_table([counter[token] / total for token in next_tokens])
+
+            self.offsets[state_id] = len(tokens)
+            self.counts[state_id] = len(next_tokens)
+            tokens += next_tokens
+            alias_tokens += [next_tokens[column] for column in alias]
+            acceptances += list(acceptance)
+
+        self.tokens = np.array(tokens, dtype='int64')
+        self.alias_tokens = np.array(alias_tokens, dtype='int64')
+        self.acceptances = np.array(acceptances)
+
+        # State reached after each entry's token, -1 when the token ends the text
+        def next_states(entry_tokens, entry_states):
+            return np.array([state_ids.get(state[1:] + (token,), -1) for token, state in zip(entry_tokens, entry_states)], dtype='int64')
+
+        entry_states = [state for state_id, state in enumerate(states) for _ in range(self.counts[state_id])]
+        self.next_states = next_states(tokens, entry_states)
+        self.alias_next_states = next_states(alias_tokens, entry_states)
+        self.start_state = state_ids.get((self.start_id,) * self.order, -1)
+
+        self.vocabulary = np.array(self.vocabulary, dtype=object)
+        return self
+
+    def generate(self, n, max_length=280, batch_size=10000):
+        """
+            Generate n strings of at most max_length tokens, advancing batch_size of them together.
+        """
+        if self.start_state == -1:
+            return [''] * n
+
+        generations = []
+        for start in range(0, n, batch_size):
+            generations += self.generate_batch(min(batch_size, n - start), max_length)
+        return generations
+
+    def generate_batch(self, n, max_length):
+
+        output = np.zeros((n, max_length), dtype='int32')
+        lengths = np.zeros(n, dtype='int64')
+        current_states = np.full(n, self.start_state, dtype='int64')
+        rows = np.arange(n)
+
+        for step in range(max_length):
+            if rows.size == 0:
+                break
+
+            # Pick a column of each state's alias table, then the column's token or its alias
+            states = current_states[rows]
+            scaled = np.random.uniform(size=rows.size) * self.counts[states]
+            columns = np.minimum(scaled.astype('int64'), self.counts[states] - 1)
+            entries = self.offsets[states] + columns
+            use_alias = scaled - columns >= self.acceptances[entries]
+
+            tokens = np.where(use_alias, self.alias_tokens[entries], self.tokens[entries])
+            next_states = np.where(use_alias, self.alias_next_states[entries], self.next_states[entries])
+
+            # Texts end with the end token
+            running = tokens != self.end_id
+            rows = rows[running]
+            output[rows, step] = tokens[running]
+            lengths[rows] += 1
+            current_states[rows] = next_states[running]
+
+        separator = ' ' if self.word_level else ''
+        return [separator.join(self.vocabulary[output[row, :lengths[row]]]) for row in range(n)]
@@ -0,0 +1,48 @@
+import unittest
+import numpy as np
+from markov_generator import MarkovGenerator
+
+class TestMarkovGenerator(unittest.TestCase):
+
+    def test_generate_deterministic_chain(self):
+        """
+            Verify that a corpus with a single possible path is reproduced exactly.
+        """
+        generator = MarkovGenerator(order=2).fit(['abcd'])
+        self.assertEqual(generator.generate(3), ['abcd'] * 3)
+
+    def test_generate_only_seen_transitions(self):
+        """
+            Verify that every generated string only contains transitions seen in the corpus.
+        """
+        corpus = ['the globe is flat', 'the earth is flat', 'fake news']
+        generator = MarkovGenerator(order=3).fit(corpus)
+        seen = set()
+        for text in corpus:
+            padded = '^^^' + text + '$'
+            seen |= {padded[i:i + 4] for i in range(len(padded) - 3)}
+
+        for generation in generator.generate(500, batch_size=64):
+            padded = '^^^' + generation + '$'
+            self.assertTrue({padded[i:i + 4] for i in range(len(padded) - 3)} <= seen)
+
+    def test_generate_probabilities(self):
+        generator = MarkovGenerator(order=1).fit(['a'] * 3 + ['b'])
+        generations = generator.generate(4000)
+        self.assertEqual(set(generations), {'a', 'b'})
+        self.assertTrue(2700 < generations.count('a') < 3300)
+
+    def test_generate_word_level(self):
+        generator = MarkovGenerator(order=1, word_level=True).fit(["Don't look at @realDonaldTrump!"])
+        self.assertEqual(generator.generate(2), ["Don't look at @realDonaldTrump"] * 2)
+
+    def test_generate_max_length(self):
+        generator = MarkovGenerator(order=1).fit(['aaaaaaaaaa'])
+        self.assertTrue(all(len(generation) <= 4 for generation in generator.generate(20, max_length=4)))
+
+    def test_generate_empty_corpus(self):
+        self.assertEqual(MarkovGenerator().fit([]).generate(2), ['', ''])
+        self.assertEqual(MarkovGenerator().fit(['']).generate(2), ['', ''])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,301 @@
+"""
+    NumPy implementation of the textgenrnn character model, allowing generation without importing
+    Keras or TensorFlow.
+"""
+
+import json
+import os
+import importlib.util
+import h5py
+import numpy as np
+
+def encode_sequence(text, vocab, maxlen):
+    """
+        Encodes text into a (1, maxlen) array of vocab indices, left padded with zeros and
+        truncated from the left, as done by textgenrnn.
+    """
+    encoded = np.zeros((1, maxlen), dtype='int32')
+    indices = [vocab.get(x, 0) for x in text][-maxlen:]
+    if indices:
+        encoded[0, -len(indices):] = indices
+    return encoded
+
+def load_weights(weights_path):
+    """
+        Returns dictionary mapping layer names to their weight arrays, read from a Keras weights file.
+    """
+    weights = dict()
+    with h5py.File(weights_path, 'r') as weights_file:
+        for layer_name in weights_file.attrs['layer_names']:
+            layer_name = layer_name.decode('utf8') if isinstance(layer_name, bytes) else layer_name
+            layer_group = weights_file[layer_name]
+            weight_names = [name.decode('utf8') if isinstance(name, bytes) else name for name in layer_group.attrs['weight_names']]
+            weights[layer_name] = [np.array(layer_group[weight_name]) for weight_name in weight_names]
+    return weights
+
+def find_vocab_path():
+    """
+        Returns path to the vocab file shipped with the textgenrnn package, without importing it.
+    """
+    spec = importlib.util.find_spec('textgenrnn')
+    if spec is None or not spec.submodule_search_locations:
+        raise ValueError('textgenrnn package not found, vocab path must be passed')
+    return os.path.join(list(spec.submodule_search_locations)[0], 'textgenrnn_vocab.json')
+
+def hard_sigmoid(x):
+    """
+        Piecewise linear sigmoid approximation used by Keras as the default LSTM recurrent activation.
+    """
+    return np.clip(0.2 * x + 0.5, 0, 1)
+
+def softmax(x):
+    exp_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return exp_x / np.sum(exp_x, axis=-1, keepdims=True)
+
+def dot(x, weight):
+    """
+        Matrix multiply inputs with a weight matrix, which may be quantized. Inputs may have leading
+        batch dimensions, ie. (batch, timesteps, features).
+    """
+    if isinstance(weight, QuantizedWeight):
+        return weight.dot(x)
+
+    # np.dot does not use BLAS for inputs of more than 2 dimensions, unlike np.matmul
+    return np.matmul(x, weight)
+
+def as_float32(weight):
+    """
+        Returns weight as a float32 array, dequantizing it when quantized.
+    """
+    if isinstance(weight, QuantizedWeight):
+        return weight.dequantize()
+    return weight
+
+class QuantizedWeight:
+    """
+        Weight matrix stored as int8 with a float32 scale per channel.
+
+        Channels run along channel_axis (output columns for kernels, rows for embeddings).
+    """
+
+    def __init__(self, weight, dtype='int8', channel_axis=-1):
+
+        # float16 is larger than int8 and slower than float32 (no native float16 matmul), so only int8 is offered
+        if dtype != 'int8':
+            raise ValueError('Invalid quantization dtype passed')
+
+        reduce_axis = tuple(axis for axis in range(weight.ndim) if axis != channel_axis % weight.ndim)
+        scales = np.max(np.abs(weight), axis=reduce_axis, keepdims=True) / 127
+
+        # Channels of all zeros can take any scale
+        scales[scales == 0] = 1
+
+        self.values = np.round(weight / scales).astype('int8')
+        self.scales = scales.astype('float32')
+
+        self.shape = weight.shape
+        self.nbytes = self.values.nbytes + self.scales.nbytes
+
+    def dequantize(self):
+        return self.values.astype('float32') * self.scales
+
+    def dot(self, x):
+
+        # Per output channel scales can be applied after the product
+        if self.scales.shape[0] == 1:
+            return np.matmul(x, self.values.astype('float32')) * self.scales[0]
+        return np.matmul(x, self.dequantize())
+
+    def take(self, indices):
+        """
+            Look up rows, dequantizing only the rows requested.
+        """
+        return self.values[indices].astype('float32') * self.scales[indices]
+
+def weights_nbytes(weights):
+    return sum(weight.nbytes for weight in weights)
+
+class Embedding:
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.input_dim, self.output_dim = embeddings.shape
+
+    def __call__(self, indices):
+        if isinstance(self.embeddings, QuantizedWeight):
+            return self.embeddings.take(indices)
+        return self.embeddings[indices]
+
+    def get_weights(self):
+        return [self.embeddings]
+
+class LSTM:
+
+    def __init__(self, kernel, recurrent_kernel, bias, recurrent_activation=hard_sigmoid):
+        self.kernel = kernel
+        self.recurrent_kernel = recurrent_kernel
+        self.bias = bias
+        self.units = recurrent_kernel.shape[0]
+        self.recurrent_activation = recurrent_activation
+
+    def step(self, x, h, c, recurrent_kernel=None, projected=False):
+        """
+            Advance hidden and cell states by one timestep of inputs x.
+            Gates are laid out in Keras order (input, forget, cell, output).
+
+            Inputs already multiplied by the kernel (with bias added) can be passed with projected, and
+            the recurrent kernel as float32, so that quantized weights are not dequantized every step.
+        """
+        if recurrent_kernel is None:
+            recurrent_kernel = as_float32(self.recurrent_kernel)
+        if not projected:
+            x = dot(x, self.kernel) + self.bias
+
+        units = self.units
+        z = x + np.dot(h, recurrent_kernel)
+
+        i = self.recurrent_activation(z[:, :units])
+        f = self.recurrent_activation(z[:, units:2 * units])
+        o = self.recurrent_activation(z[:, 3 * units:])
+
+        c = f * c + i * np.tanh(z[:, 2 * units:3 * units])
+        h = o * np.tanh(c)
+        return h, c
+
+    def __call__(self, x, h=None, c=None):
+        """
+            Run over inputs of shape (batch, timesteps, features), returning final hidden and cell states.
+        """
+        if h is None:
+            h = np.zeros((x.shape[0], self.units), dtype='float32')
+        if c is None:
+            c = np.zeros((x.shape[0], self.units), dtype='float32')
+
+        # Weights are dequantized once, and inputs of every timestep projected in one product
+        recurrent_kernel = as_float32(self.recurrent_kernel)
+        projected = dot(x, self.kernel) + self.bias
+
+        for timestep in range(x.shape[1]):
+            h, c = self.step(projected[:, timestep], h, c, recurrent_kernel, projected=True)
+        return h, c
+
+    def get_weights(self):
+        return [self.kernel, self.recurrent_kernel, self.bias]
+
+class Dense:
+
+    def __init__(self, kernel, bias):
+        self.kernel = kernel
+        self.bias = bias
+        self.units = kernel.shape[1]
+
+    def __call__(self, x):
+        return softmax(dot(x, self.kernel) + self.bias)
+
+    def get_weights(self):
+        return [self.kernel, self.bias]
+
+class WindowedModel:
+    """
+        Predicts next character probabilities from (batch, maxlen) windows of encoded characters.
+    """
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    def get_layer(self, name):
+        return self.layers[name]
+
+    def predict(self, x, batch_size=None):
+        h, _ = self.layers['rnn'](self.layers['embedding'](np.asarray(x)))
+        return self.layers['output'](h)
+
+class StepModel(WindowedModel):
+    """
+        Predicts next character probabilities from (batch, 1) encoded characters and LSTM states,
+        returning the updated states along with the probabilities.
+    """
+
+    def predict(self, inputs, batch_size=None):
+        x, h, c = inputs
+        embedded = self.layers['embedding'](np.asarray(x)[:, 0])
+        h, c = self.layers['rnn'].step(embedded, h, c)
+        return [self.layers['output'](h), h, c]
+
+class NumpyTextgenrnn:
+    """
+        Drop-in replacement for textgenrnn objects in tweet generation, built from a trained weights file.
+
+        Weight matrices can be quantized to 'int8' (per channel scales) to reduce the size of the model
+        at rest. Weights are expanded back to float32 for each predict call, so windowed predictions
+        (one call for every timestep) cost about the same, but each stateful step (one call per
+        character) is slower than with float32 weights and briefly allocates more than quantization saves.
+        Biases are always kept as float32.
+    """
+
+    META_TOKEN = '<s>'
+
+    def __init__(self, weights_path, vocab_path=None, quantize=None):
+
+        if vocab_path is None:
+            vocab_path = find_vocab_path()
+
+        with open(vocab_path, 'r', encoding='utf8', errors='ignore') as json_file:
+            self.vocab = json.load(json_file)
+        self.indices_char = dict((self.vocab[c], c) for c in self.vocab)
+        self.num_classes = len(self.vocab) + 1
+
+        weights = load_weights(weights_path)
+        if quantize is not None:
+            weights['embedding'][0] = QuantizedWeight(weights['embedding'][0], quantize, channel_axis=0)
+            for layer_name in ['rnn', 'output']:
+                weights[layer_name] = [QuantizedWeight(weight, quantize) if weight.ndim == 2 else weight for weight in weights[layer_name]]
+
+        layers = {
+            'embedding': Embedding(*weights['embedding']),
+            'rnn': LSTM(*weights['rnn']),
+            'output': Dense(*weights['output'])
+        }
+
+        if layers['output'].units != self.num_classes:
+            raise ValueError('Vocab is not consistent in size with weights')
+
+        self.layers = layers
+        self.model = WindowedModel(layers)
+        self.stateful_model = StepModel(layers)
+
+    def nbytes(self):
+        """
+            Returns the number of bytes held by the model weights.
+        """
+        return sum(weights_nbytes(layer.get_weights()) for layer in self.layers.values())
+
+def quantization_report(reference, quantized, texts, maxlen=40):
+    """
+        Compare next character predictions of a quantized model against a reference model, over
+        every prefix of the texts passed (such as texts generated by the reference model).
+
+        Returns dictionary with the maximum absolute probability error, mean KL divergence, rate at
+        which the most likely character agrees, and the weight sizes in bytes of both models.
+    """
+    meta_token = '<s>'
+
+    encoded = []
+    for text in texts:
+        text = [meta_token] + list(text)
+        for end in range(1, len(text) + 1):
+            encoded.append(encode_sequence(text[:end], reference.vocab, maxlen))
+    encoded = np.concatenate(encoded)
+
+    reference_preds = reference.model.predict(encoded)
+    quantized_preds = quantized.model.predict(encoded)
+
+    kl_divergences = np.sum(reference_preds * (np.log(reference_preds + 1e-12) - np.log(quantized_preds + 1e-12)), axis=1)
+
+    return {
+        'max_abs_error': float(np.max(np.abs(reference_preds - quantized_preds))),
+        'mean_kl_divergence': float(np.mean(kl_divergences)),
+        'top_agreement': float(np.mean(np.argmax(reference_preds, axis=1) == np.argmax(quantized_preds, axis=1))),
+        'reference_nbytes': reference.nbytes(),
+        'quantized_nbytes': quantized.nbytes()
+    }
@@ -0,0 +1,162 @@
+import unittest
+import json
+import os
+import h5py
+import numpy as np
+from numpy_textgenrnn import *
+
+def write_sample_model(weights_path, vocab_path):
+    """
+        Write a small weights file (in the Keras layout) and matching vocab file, returning the vocab.
+    """
+    vocab = {'a': 1, 'b': 2, 'c': 3, '<s>': 4}
+    with open(vocab_path, 'w') as json_file:
+        json_file.write(json.dumps(vocab))
+
+    random_state = np.random.RandomState(0)
+    num_classes, dim_embeddings, units = 5, 3, 4
+    layer_weights = {
+        'embedding': [('embedding/embeddings:0', (num_classes, dim_embeddings))],
+        'rnn': [('rnn/kernel:0', (dim_embeddings, 4 * units)), ('rnn/recurrent_kernel:0', (units, 4 * units)), ('rnn/bias:0', (4 * units,))],
+        'output': [('output/kernel:0', (units, num_classes)), ('output/bias:0', (num_classes,))]
+    }
+
+    with h5py.File(weights_path, 'w') as weights_file:
+        weights_file.attrs['layer_names'] = [name.encode('utf8') for name in ['input'] + list(layer_weights)]
+        weights_file.create_group('input').attrs['weight_names'] = np.array([], dtype='S1')
+        for layer_name, weights in layer_weights.items():
+            group = weights_file.create_group(layer_name)
+            group.attrs['weight_names'] = [weight_name.encode('utf8') for weight_name, _ in weights]
+            for weight_name, shape in weights:
+                group.create_dataset(weight_name, data=random_state.normal(size=shape).astype('float32'))
+
+    return vocab
+
+class TestNumpyTextgenrnn(unittest.TestCase):
+
+    def setUp(self):
+        """
+            Create a small weights file (in the Keras layout) and matching vocab file.
+        """
+        self.vocab = write_sample_model('sample_weights.hdf5', 'sample_vocab.json')
+
+    def tearDown(self):
+        os.remove('sample_vocab.json')
+        os.remove('sample_weights.hdf5')
+
+    def test_encode_sequence(self):
+        """
+            Verify that sequences are left padded and truncated from the left.
+        """
+        np.testing.assert_array_equal(encode_sequence(['a', 'b'], self.vocab, 4), [[0, 0, 1, 2]])
+        np.testing.assert_array_equal(encode_sequence(['a', 'b', 'c', 'a', 'b'], self.vocab, 4), [[2, 3, 1, 2]])
+        np.testing.assert_array_equal(encode_sequence(['z'], self.vocab, 2), [[0, 0]])
+        np.testing.assert_array_equal(encode_sequence([], self.vocab, 2), [[0, 0]])
+
+    def test_load_weights(self):
+        weights = load_weights('sample_weights.hdf5')
+        self.assertEqual(weights['input'], [])
+        self.assertEqual([weight.shape for weight in weights['rnn']], [(3, 16), (4, 16), (16,)])
+
+    def test_constructor_inconsistent_vocab(self):
+        with open('sample_vocab.json', 'w') as json_file:
+            json_file.write(json.dumps({'a': 1}))
+        with self.assertRaises(ValueError):
+            NumpyTextgenrnn('sample_weights.hdf5', 'sample_vocab.json')
+
+    def test_predict_probabilities(self):
+        """
+            Verify that windowed predictions are probability distributions over every class.
+        """
+        model = NumpyTextgenrnn('sample_weights.hdf5', 'sample_vocab.json')
+        encoded = np.concatenate([encode_sequence(['<s>'], model.vocab, 6), encode_sequence(['<s>', 'a', 'b'], model.vocab, 6)])
+        preds = model.model.predict(encoded, batch_size=2)
+        self.assertEqual(preds.shape, (2, 5))
+        np.testing.assert_allclose(preds.sum(axis=1), [1, 1], rtol=1e-5)
+
+    def test_step_model_matches_windowed_model(self):
+        """
+            Verify that feeding a window one character at a time gives the same prediction as the windowed model.
+        """
+        model = NumpyTextgenrnn('sample_weights.hdf5', 'sample_vocab.json')
+        encoded = encode_sequence(['<s>', 'a', 'c', 'b'], model.vocab, 6)
+
+        h = np.zeros((1, 4), dtype='float32')
+        c = np.zeros((1, 4), dtype='float32')
+        for index in encoded[0]:
+            step_preds, h, c = model.stateful_model.predict([np.array([[index]]), h, c])
+
+        np.testing.assert_allclose(step_preds, model.model.predict(encoded), rtol=1e-5)
+
+    def test_quantized_weight_dot(self):
+        """
+            Verify that quantized weights give products close to the float32 weights.
+        """
+        random_state = np.random.RandomState(1)
+        weight = random_state.normal(size=(6, 8)).astype('float32')
+        x = random_state.normal(size=(3, 6)).astype('float32')
+
+        quantized = QuantizedWeight(weight, 'int8')
+        np.testing.assert_allclose(quantized.dot(x), np.dot(x, weight), atol=.05)
+        np.testing.assert_allclose(quantized.dequantize(), weight, atol=.05)
+
+        self.assertEqual(QuantizedWeight(weight, 'int8').values.dtype, np.int8)
+        self.assertLess(QuantizedWeight(weight, 'int8').nbytes, weight.nbytes)
+
+    def test_quantized_weight_take(self):
+        weight = np.array([[1, -2], [0, 0], [.5, .25]], dtype='float32')
+        quantized = QuantizedWeight(weight, 'int8', channel_axis=0)
+        np.testing.assert_allclose(quantized.take(np.array([2, 1])), weight[[2, 1]], atol=.01)
+
+    def test_quantized_weight_invalid_dtype(self):
+        with self.assertRaises(ValueError):
+            QuantizedWeight(np.ones((2, 2)), 'int4')
+        with self.assertRaises(ValueError):
+            QuantizedWeight(np.ones((2, 2)), 'float16')
+
+    def test_quantization_report(self):
+        """
+            Verify that quantized models stay close to the float32 model and use less memory.
+        """
+        model = NumpyTextgenrnn('sample_weights.hdf5', 'sample_vocab.json')
+        quantized_model = NumpyTextgenrnn('sample_weights.hdf5', 'sample_vocab.json', quantize='int8')
+        report = quantization_report(model, quantized_model, ['abc', 'cab'], maxlen=6)
+
+        self.assertLess(report['max_abs_error'], .01)
+        self.assertLess(report['mean_kl_divergence'], 1e-4)
+        self.assertEqual(report['top_agreement'], 1)
+        self.assertLess(report['quantized_nbytes'], report['reference_nbytes'])
+
+    def test_projection_matches_timesteps(self):
+        """
+            Verify that projecting (batch, timesteps, features) inputs at once matches projecting each timestep.
+        """
+        random_state = np.random.RandomState(2)
+        weight = random_state.normal(size=(6, 8)).astype('float32')
+        x = random_state.normal(size=(3, 5, 6)).astype('float32')
+
+        for kernel in [weight, QuantizedWeight(weight)]:
+            projected = dot(x, kernel)
+            self.assertEqual(projected.shape, (3, 5, 8))
+            for timestep in range(x.shape[1]):
+                np.testing.assert_allclose(projected[:, timestep], dot(x[:, timestep], kernel), rtol=1e-5, atol=1e-6)
+
+    def test_quantized_model_predict(self):
+        """
+            Verify that quantized windowed and stateful predictions agree, with weights dequantized per call.
+        """
+        model = NumpyTextgenrnn('sample_weights.hdf5', 'sample_vocab.json', quantize='int8')
+        encoded = encode_sequence(['<s>', 'a', 'c', 'b'], model.vocab, 6)
+
+        h = np.zeros((1, 4), dtype='float32')
+        c = np.zeros((1, 4), dtype='float32')
+        for index in encoded[0]:
+            step_preds, h, c = model.stateful_model.predict([np.array([[index]]), h, c])
+
+        np.testing.assert_allclose(step_preds, model.model.predict(encoded), rtol=1e-5)
+
+    def test_hard_sigmoid(self):
+        np.testing.assert_allclose(hard_sigmoid(np.array([-5, -1, 0, 1, 5])), [0, .3, .5, .7, 1])
+
+if __name__ == "__main__":
+    unittest.main()
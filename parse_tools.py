@@ -5,7 +5,10 @@ from difflib import SequenceMatcher
 from collections import Counter
 import random
 import string
+import multiprocessing
 from stat_tools import *
+from handle_index import HandleIndex, load_handle_index
+from word_counter import WordCounter
 
 # TODO:
 # - Include links to libary methods
@@ -20,6 +23,28 @@ class ParseTools:
     twitter_ht_re = r'(?<=^|(?<=[^a-zA-Z0-9-_\.]))#([A-Za-z]+[A-Za-z0-9]+)'
     apostrophe_re = r"[\w]+'[\w]+"
 
+    # Handles as found by extract_ats, which drops a '.' before the '@' prior to matching
+    twitter_name_token_re = r'(?:(?<=^)|(?<=[^a-zA-Z0-9-_\.])|(?<=^\.)|(?<=[^a-zA-Z0-9-_\.]\.))@[A-Za-z]+[A-Za-z0-9]+'
+    twitter_ht_token_re = r'(?<=^|(?<=[^a-zA-Z0-9-_\.]))#[A-Za-z]+[A-Za-z0-9]+'
+
+    twitter_word_token_re = re.compile(twitter_name_token_re + '|' + twitter_ht_token_re)
+
+    # Tokenizers for extract_words, in order of precedence. Handles and hashtags are only kept intact
+    # where they stand alone, and when found as twitter words somewhere in the string
+    word_token_re = re.compile('|'.join([apostrophe_re, r'\w+']))
+    tweet_token_re = re.compile('|'.join([
+        twitter_link_re,
+        twitter_pic_link_re,
+        r"(?P<twitter_word>(?<!\w)[@#][A-Za-z]+[A-Za-z0-9]+(?!\w|'\w))",
+        apostrophe_re,
+        r'\w+'
+    ]))
+
+    # Fused replacements of re_apostrophize and re_amp, and runs reduced by reduce_punctuations
+    clean_replacements = {' s ': "'s ", '&amp;': '&'}
+    clean_replacements_re = re.compile(' s |&amp;')
+    punctuation_run_re = re.compile(r'([!?.])\1\1')
+
     @staticmethod
     def replace_ats_with(replacement):
         replacement_function = lambda x: ParseTools.replace_ats(x, replacement)
@@ -34,11 +59,57 @@ class ParseTools:
 
     @staticmethod
     def clean_tweets(tweets):
-        ats = set(pd.read_pickle('Data/ats')['ats'])
+        ats = load_handle_index()
         cleans = [lambda x: ParseTools.fix_ats(x, ats), ParseTools.re_apostrophize, ParseTools.re_amp, ParseTools.reduce_punctuations]
         cleaner = lambda x: ParseTools.apply_functions(x, cleans)
         return list(map(cleaner, tweets))
 
+    @staticmethod
+    def clean_tweet(tweet, ats):
+        """
+            Same as the cleans of clean_tweets, with re_apostrophize and re_amp fused into one pass, and
+            each step skipped when the tweet has nothing for it to replace.
+        """
+        if '@' in tweet:
+            tweet = ParseTools.fix_ats(tweet, ats)
+
+        tweet = ParseTools.clean_replacements_re.sub(lambda match: ParseTools.clean_replacements[match.group(0)], tweet)
+
+        if ParseTools.punctuation_run_re.search(tweet):
+            tweet = ParseTools.reduce_punctuations(tweet)
+
+        return tweet
+
+    @staticmethod
+    def clean_tweets_chunk(tweets, seed=None):
+        if seed is not None:
+            np.random.seed(seed)
+        ats = load_handle_index()
+        return [ParseTools.clean_tweet(tweet, ats) for tweet in tweets]
+
+    @staticmethod
+    def clean_tweets_batch(tweets, processes=1, seed=None, chunk_size=1000):
+        """
+            Clean a list or Series of tweets, returning the same type. Output equals clean_tweets under the
+            same numpy random state (or seed).
+
+            With several processes, tweets are split into chunks of chunk_size, each drawing from an
+            independent random stream spawned from seed, so results are reproducible for a fixed seed
+            and chunk size.
+        """
+        index = tweets.index if isinstance(tweets, pd.Series) else None
+        tweets = list(tweets)
+
+        if processes == 1 or len(tweets) <= chunk_size:
+            cleaned = ParseTools.clean_tweets_chunk(tweets, seed)
+        else:
+            chunks = [tweets[start:start + chunk_size] for start in range(0, len(tweets), chunk_size)]
+            chunk_seeds = [seed_sequence.generate_state(4) for seed_sequence in np.random.SeedSequence(seed).spawn(len(chunks))]
+            with multiprocessing.Pool(processes) as pool:
+                cleaned = [tweet for chunk in pool.starmap(ParseTools.clean_tweets_chunk, zip(chunks, chunk_seeds)) for tweet in chunk]
+
+        return cleaned if index is None else pd.Series(cleaned, index=index)
+
     @staticmethod
     def reduce_punctuations(tweet):
         '''
@@ -54,7 +125,8 @@ class ParseTools:
     @staticmethod
     def fix_ats(tweet, at_set):
         """
-            Replace all ats in tweet with closest match in at_set
+            Replace all ats in tweet with closest match in at_set, which may be a
+            HandleIndex for faster (memoized) lookups.
         """
         at_map = dict()
         tweet_ats = ParseTools.extract_ats(tweet)
@@ -78,9 +150,16 @@ class ParseTools:
             return func
         return [finds(i) for i in words]
 
+    @staticmethod
+    def get_word_counter(words):
+        """
+            Returns WordCounter giving the counts of every count function of get_count_funcs(words) at once.
+        """
+        return WordCounter(words)
+
     @staticmethod
     def avg_word_frequency(string):
-        return avg_element_frequency(extract_words(string))
+        return avg_element_frequency(ParseTools.extract_words(string))
 
     @staticmethod
     def count_ats(string):
@@ -232,23 +311,29 @@ class ParseTools:
         """
             Return words from string. Twitter words (handles, links, hashtags)
             are kept intact by default.
+
+            Words are matched in a left to right scan with compiled expressions, trying
+            links, then handles and hashtags, then apostrophe words (ie. don't), then plain words.
         """
+        if twitter_words is not True:
+            return ParseTools.word_token_re.findall(string)
+
+        found_twitter_words = set(ParseTools.twitter_word_token_re.findall(string))
 
-        # Compile set of hard to extract words
-        placeholder_mappings = dict()
-        words_to_map = set(ParseTools.extract_apostrophe_words(string))
-        if twitter_words is True:
-            words_to_map |= set(ParseTools.extract_ats(string) + ParseTools.extract_http_links(string) + ParseTools.extract_pic_links(string) + ParseTools.extract_hts(string))
+        words = []
+        position = 0
+        while True:
+            match = ParseTools.tweet_token_re.search(string, position)
+            if match is None:
+                return words
 
-        # Map all hard to extract words to unique random strings
-        for word in words_to_map:
-            random_string = ParseTools.get_random_string(16)
-            placeholder_mappings[random_string] = word
-            string = string.replace(word, random_string)
+            # Rescan from after the '@' or '#' when not a twitter word
+            if match.group('twitter_word') and match.group(0) not in found_twitter_words:
+                position = match.start() + 1
+                continue
 
-        # Remove symbols, splti on spaces, and replace hard to extract placeholders with their original words
-        word_list = re.sub(r'[^\w]', ' ', string).split()
-        return list(map(lambda x: placeholder_mappings[x] if x in placeholder_mappings else x, word_list))
+            words.append(match.group(0))
+            position = match.end()
 
     @staticmethod
     def remove_dots(string):
@@ -331,6 +416,9 @@ class ParseTools:
         """
             Find string candidate most near string passed.
         """
+        if isinstance(candidates, HandleIndex):
+            return candidates.find_nearest(string)
+
         if string in candidates:
             return string
 
@@ -2,6 +2,8 @@ from parse_tools import ParseTools
 import unittest
 import string
 import re
+import numpy as np
+import pandas as pd
 
 class TestParseTool(unittest.TestCase):
 
@@ -28,6 +30,11 @@ class TestParseTool(unittest.TestCase):
         self.assertEqual(test_funcs[0]("String with John twice John"), 2)
         self.assertEqual(test_funcs[1]("String with John twice John"), 0)
 
+    def test_get_word_counter(self):
+        counter = ParseTools.get_word_counter(['John', 'Jacob'])
+        self.assertEqual(list(counter.counts("String with John twice John")), [2, 0])
+        self.assertEqual(counter.names, [func.__name__ for func in ParseTools.get_count_funcs(['John', 'Jacob'])])
+
     def test_length_n_sequences(self):
         test_char = '.'
         test_n = 3
@@ -284,6 +291,16 @@ class TestParseTool(unittest.TestCase):
         self.assertEqual(ParseTools.extract_words("This string contains a twitter username followed by a colon @realDonaldTrump:"), ["This", "string", "contains", "a", "twitter", "username", "followed", "by", "a", "colon", "@realDonaldTrump"])
         self.assertEqual(ParseTools.extract_words("This string contains a twitter username with a trailing period .@realDonaldTrump"), ["This", "string", "contains", "a", "twitter", "username", "with", "a", "trailing", "period", "@realDonaldTrump"])
 
+    def test_extract_words_overlapping_twitter_words(self):
+        """
+            Verify that twitter words are kept intact only where they stand alone.
+        """
+        self.assertEqual(ParseTools.extract_words("@realDonaldTrump's tweet"), ["realDonaldTrump's", "tweet"])
+        self.assertEqual(ParseTools.extract_words("email@domain.com #MAGA-#MAGA"), ["email", "domain", "com", "#MAGA", "#MAGA"])
+        self.assertEqual(ParseTools.extract_words("Not a handle -@realDonaldTrump"), ["Not", "a", "handle", "realDonaldTrump"])
+        self.assertEqual(ParseTools.extract_words("@realDonaldTrump -@realDonaldTrump"), ["@realDonaldTrump", "@realDonaldTrump"])
+        self.assertEqual(ParseTools.extract_words("#MAGA @realDonaldTrump", twitter_words=False), ["MAGA", "realDonaldTrump"])
+
     def test_extract_words_null_string(self):
         """
             Verify that extract_words correctly extracts nothing from the null string.
@@ -473,5 +490,31 @@ class TestParseTool(unittest.TestCase):
         self.assertEqual(ParseTools.remove_outer_quotes('String with one outer quote"'), 'String with one outer quote"')
         self.assertEqual(ParseTools.remove_outer_quotes('"String with one outer quote'), '"String with one outer quote')
 
+    def test_clean_tweets_batch_matches_clean_tweets(self):
+        """
+            Verify that batch cleaning gives the same tweets as clean_tweets under the same random state.
+        """
+        tweets = ["Thank you @FoxNwes!!!! See you soon.....", "Trump s plan &amp; more", "Nothing to clean", "", "Wow?????? @CNN"]
+        np.random.seed(0)
+        expected = ParseTools.clean_tweets(tweets)
+        np.random.seed(0)
+        self.assertEqual(ParseTools.clean_tweets_batch(tweets), expected)
+        self.assertEqual(expected[1], "Trump's plan & more")
+
+    def test_clean_tweets_batch_series(self):
+        tweets = pd.Series(["Trump s plan", "A &amp; B"], index=[3, 7])
+        cleaned = ParseTools.clean_tweets_batch(tweets)
+        self.assertEqual(list(cleaned.index), [3, 7])
+        self.assertEqual(list(cleaned), ["Trump's plan", "A & B"])
+
+    def test_clean_tweets_batch_processes(self):
+        """
+            Verify that parallel cleaning is reproducible for a fixed seed, whatever the number of processes.
+        """
+        tweets = ["Great!!!!! Trump s plan &amp; more???"] * 10
+        cleaned = ParseTools.clean_tweets_batch(tweets, processes=2, seed=0, chunk_size=3)
+        self.assertEqual(cleaned, ParseTools.clean_tweets_batch(tweets, processes=3, seed=0, chunk_size=3))
+        self.assertTrue(all(tweet.startswith("Great!") and "Trump's plan & more?" in tweet for tweet in cleaned))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,151 @@
+"""
+    Phrase cache backends for grammar_object.Grammar, mapping phrases to their number of grammar errors.
+"""
+
+import os
+import json
+import sqlite3
+import hashlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+class SqlitePhraseCache(MutableMapping):
+    """
+        Phrase cache stored in an SQLite database, usable anywhere a phrase cache dict is.
+
+        Lookups and inserts only touch the phrases involved, so the cache never has to be loaded or
+        rewritten whole. The database is in WAL mode, so processes sharing the file can read while another
+        writes; each process (ie. after a fork) opens its own connection.
+    """
+
+    def __init__(self, path, timeout=30):
+        self.path = path
+        self.timeout = timeout
+        self.connection_pid = None
+
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS phrases (phrase TEXT PRIMARY KEY, errors INTEGER NOT NULL)')
+
+    @property
+    def connection(self):
+        if self.connection_pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self.connection_pid = os.getpid()
+        return self._connection
+
+    def __getitem__(self, phrase):
+        row = self.connection.execute('SELECT errors FROM phrases WHERE phrase = ?', (phrase,)).fetchone()
+        if row is None:
+            raise KeyError(phrase)
+        return row[0]
+
+    def __contains__(self, phrase):
+        return self.connection.execute('SELECT 1 FROM phrases WHERE phrase = ?', (phrase,)).fetchone() is not None
+
+    def __setitem__(self, phrase, errors):
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO phrases (phrase, errors) VALUES (?, ?)', (phrase, errors))
+
+    def __delitem__(self, phrase):
+        with self.connection:
+            if self.connection.execute('DELETE FROM phrases WHERE phrase = ?', (phrase,)).rowcount == 0:
+                raise KeyError(phrase)
+
+    def __iter__(self):
+        return (phrase for phrase, in self.connection.execute('SELECT phrase FROM phrases').fetchall())
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM phrases').fetchone()[0]
+
+    def update(self, other=(), **kwargs):
+        """
+            Insert every phrase in one transaction.
+        """
+        items = list(dict(other, **kwargs).items())
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO phrases (phrase, errors) VALUES (?, ?)', items)
+
+    def import_json(self, json_path):
+        """
+            Add phrases of a JSON phrase cache (ie. as written by Grammar.write_phrase_cache).
+        """
+        with open(json_path, "r") as text_file:
+            self.update(json.loads(text_file.read()))
+
+    def close(self):
+        if self.connection_pid == os.getpid():
+            self._connection.close()
+        self.connection_pid = None
+
+class BoundedPhraseCache(MutableMapping):
+    """
+        In-memory phrase cache holding at most max_entries phrases (and at most max_bytes of entries, when
+        passed), evicting the least recently used phrases first.
+
+        Phrases are keyed by a digest of digest_size bytes rather than stored, so the keys of the cache
+        (ie. when iterating) are digests. Entries may be accessed by phrase or by digest.
+    """
+
+    # Phrases cannot be recovered from the keys (ie. to write the cache as JSON)
+    stores_phrases = False
+
+    # Approximate bytes of an entry besides its digest (ie. dictionary slot, link and count)
+    entry_overhead = 100
+
+    def __init__(self, max_entries=100000, max_bytes=None, digest_size=16):
+
+        if max_entries is not None and max_entries < 1:
+            raise ValueError('Phrase cache must hold at least one entry')
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.digest_size = digest_size
+        self.entries = OrderedDict()
+        self.evictions = 0
+
+    def digest(self, phrase):
+        return hashlib.blake2b(phrase.encode('utf8'), digest_size=self.digest_size).digest()
+
+    def key(self, phrase):
+        """
+            Returns the digest of a phrase, or the key itself when already a digest.
+        """
+        return phrase if isinstance(phrase, bytes) else self.digest(phrase)
+
+    @property
+    def nbytes(self):
+        return len(self.entries) * (self.digest_size + self.entry_overhead)
+
+    def __getitem__(self, phrase):
+        key = self.key(phrase)
+        if key not in self.entries:
+            raise KeyError(phrase)
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def __contains__(self, phrase):
+        return self.key(phrase) in self.entries
+
+    def __setitem__(self, phrase, errors):
+        key = self.key(phrase)
+        self.entries[key] = errors
+        self.entries.move_to_end(key)
+
+        while (self.max_entries is not None and len(self.entries) > self.max_entries) or \
+              (self.max_bytes is not None and len(self.entries) > 1 and self.nbytes > self.max_bytes):
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def __delitem__(self, phrase):
+        key = self.key(phrase)
+        if key not in self.entries:
+            raise KeyError(phrase)
+        del self.entries[key]
+
+    def __iter__(self):
+        return iter(list(self.entries))
+
+    def __len__(self):
+        return len(self.entries)
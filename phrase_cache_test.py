@@ -0,0 +1,112 @@
+import unittest
+import json
+import os
+import multiprocessing
+from phrase_cache import *
+
+def insert_phrases(path, start):
+    cache = SqlitePhraseCache(path)
+    for count in range(start, start + 20):
+        cache['Phrase ' + str(count)] = count
+
+class TestSqlitePhraseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = SqlitePhraseCache('sample_phrase_cache.db')
+
+    def tearDown(self):
+        self.cache.close()
+        for suffix in ['', '-wal', '-shm']:
+            if os.path.exists('sample_phrase_cache.db' + suffix):
+                os.remove('sample_phrase_cache.db' + suffix)
+        if os.path.exists('sample_phrase_cache.json'):
+            os.remove('sample_phrase_cache.json')
+
+    def test_mapping(self):
+        self.cache['Sample phrase'] = 0
+        self.cache['Another sample phrase'] = 2
+        self.cache['Another sample phrase'] = 3
+
+        self.assertEqual(self.cache['Another sample phrase'], 3)
+        self.assertIn('Sample phrase', self.cache)
+        self.assertNotIn('Missing phrase', self.cache)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(dict(self.cache), {'Sample phrase': 0, 'Another sample phrase': 3})
+
+        del self.cache['Sample phrase']
+        self.assertEqual(list(self.cache), ['Another sample phrase'])
+        with self.assertRaises(KeyError):
+            self.cache['Sample phrase']
+        with self.assertRaises(KeyError):
+            del self.cache['Sample phrase']
+
+    def test_persisted(self):
+        self.cache.update({'Sample phrase': 0, 'Another sample phrase': 2})
+        self.assertEqual(SqlitePhraseCache('sample_phrase_cache.db')['Another sample phrase'], 2)
+
+    def test_import_json(self):
+        with open('sample_phrase_cache.json', 'w') as text_file:
+            text_file.write(json.dumps({'Sample phrase': 0, 'Another sample phrase': 2}))
+        self.cache.import_json('sample_phrase_cache.json')
+        self.assertEqual(dict(self.cache), {'Sample phrase': 0, 'Another sample phrase': 2})
+
+    def test_concurrent_processes(self):
+        """
+            Verify that several processes can write to the same cache.
+        """
+        with multiprocessing.Pool(3) as pool:
+            pool.starmap(insert_phrases, [('sample_phrase_cache.db', start) for start in [0, 20, 40]])
+        self.assertEqual(len(self.cache), 60)
+        self.assertEqual(self.cache['Phrase 45'], 45)
+
+class TestBoundedPhraseCache(unittest.TestCase):
+
+    def test_least_recently_used_evicted(self):
+        cache = BoundedPhraseCache(max_entries=2)
+        cache['Sample phrase'] = 0
+        cache['Another sample phrase'] = 2
+        self.assertEqual(cache['Sample phrase'], 0)
+        cache['Third phrase'] = 1
+
+        self.assertIn('Sample phrase', cache)
+        self.assertNotIn('Another sample phrase', cache)
+        self.assertEqual((len(cache), cache.evictions), (2, 1))
+        with self.assertRaises(KeyError):
+            cache['Another sample phrase']
+
+    def test_max_bytes(self):
+        cache = BoundedPhraseCache(max_entries=None, max_bytes=3 * (16 + BoundedPhraseCache.entry_overhead))
+        cache.update(('Phrase ' + str(count), count) for count in range(5))
+        self.assertEqual((len(cache), cache.evictions), (3, 2))
+        self.assertEqual(cache.get('Phrase 4'), 4)
+        self.assertIsNone(cache.get('Phrase 0'))
+
+    def test_digest_keys(self):
+        """
+            Verify that keys are digests, which can be used like the phrases they come from.
+        """
+        cache = BoundedPhraseCache(digest_size=8)
+        cache['A long phrase ' * 100] = 3
+        cache['Sample phrase'] = 0
+
+        self.assertEqual([len(key) for key in cache], [8, 8])
+        self.assertEqual(cache['A long phrase ' * 100], 3)
+        self.assertEqual(dict(cache.items()), {cache.digest('A long phrase ' * 100): 3, cache.digest('Sample phrase'): 0})
+        self.assertEqual(sorted(cache.values()), [0, 3])
+        self.assertEqual(dict(cache), dict(cache.items()))
+
+        other_cache = BoundedPhraseCache(digest_size=8)
+        other_cache.update(cache.items())
+        self.assertEqual(other_cache, cache)
+
+        del cache[cache.digest('Sample phrase')]
+        self.assertNotIn('Sample phrase', cache)
+        with self.assertRaises(KeyError):
+            del cache['Sample phrase']
+
+    def test_invalid_max_entries(self):
+        with self.assertRaises(ValueError):
+            BoundedPhraseCache(max_entries=0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -99,7 +99,8 @@ def combine_distributions(distributions, distribution_probability_column_name=No
 # - Provide link to sources
 def apply_temperature(preds, temperature):
     """
-        Apply temperature scaling to predictions.
+        Apply temperature scaling to predictions. Each row is scaled independently when a 2D array
+        of predictions is passed.
     """
 
     # Temperature of 1 will have no effect on predictions
@@ -113,8 +114,113 @@ def apply_temperature(preds, temperature):
     # Perform temperature scaling
     preds = np.log(preds + 1e-12) / temperature
     exp_preds = np.exp(preds)
-    preds = exp_preds / np.sum(exp_preds)
+    preds = exp_preds / np.sum(exp_preds, axis=-1, keepdims=True)
 
     # Reduce risk of probabilities exceeding 1.0
     preds = preds - 1e-06
     return preds.clip(min=0)
+
+def sample_indices(probabilities):
+    """
+        Sample an index from each row of probabilities using inverse transform sampling.
+        Rows need not sum exactly to 1, but must have some positive probability.
+    """
+    probabilities = np.atleast_2d(probabilities)
+    cdf = np.cumsum(probabilities, axis=1)
+    if not np.all(cdf[:, -1] > 0):
+        raise ValueError('Probabilities of a row are all zero')
+
+    thresholds = np.random.uniform(size=(cdf.shape[0], 1)) * cdf[:, -1:]
+    indices = np.sum(cdf <= thresholds, axis=1)
+
+    # Thresholds rounded up to the row total would pass trailing zeros, so stop at the last positive column
+    last_positive = probabilities.shape[1] - 1 - np.argmax(probabilities[:, ::-1] > 0, axis=1)
+    return np.minimum(indices, last_positive)
+
+def top_k_filter(probabilities, k):
+    """
+        Zero all but the k largest probabilities of each row. Rows are not rescaled.
+    """
+    if k < 1:
+        raise ValueError('At least one probability must be kept')
+
+    probabilities = np.atleast_2d(probabilities)
+    if k >= probabilities.shape[1]:
+        return probabilities
+
+    top_indices = np.argpartition(-probabilities, k - 1, axis=1)[:, :k]
+    filtered = np.zeros_like(probabilities)
+    np.put_along_axis(filtered, top_indices, np.take_along_axis(probabilities, top_indices, axis=1), axis=1)
+    return filtered
+
+def top_p_filter(probabilities, p, candidate_count=None):
+    """
+        Keep the smallest set of largest probabilities of each row whose total reaches p of the row's
+        total (nucleus filtering), zeroing the rest. Rows are not rescaled.
+
+        Only the candidate_count largest probabilities of each row are sorted, if passed (ie. after
+        top k filtering).
+    """
+    if not 0 < p <= 1:
+        raise ValueError('p must be greater than 0 and at most 1')
+
+    probabilities = np.atleast_2d(probabilities)
+    row_count, column_count = probabilities.shape
+
+    # Sort only the candidates that could be kept
+    if candidate_count is not None and candidate_count < column_count:
+        candidates = np.argpartition(-probabilities, candidate_count - 1, axis=1)[:, :candidate_count]
+    else:
+        candidates = np.tile(np.arange(column_count), (row_count, 1))
+
+    candidate_probabilities = np.take_along_axis(probabilities, candidates, axis=1)
+    order = np.argsort(-candidate_probabilities, axis=1)
+    sorted_candidates = np.take_along_axis(candidates, order, axis=1)
+    sorted_probabilities = np.take_along_axis(candidate_probabilities, order, axis=1)
+
+    # Keep candidates while the total before them is short of p, so the most likely is always kept
+    totals = np.sum(probabilities, axis=1, keepdims=True)
+    preceding = np.cumsum(sorted_probabilities, axis=1) - sorted_probabilities
+    kept = preceding < p * totals
+
+    filtered = np.zeros_like(probabilities)
+    np.put_along_axis(filtered, sorted_candidates, np.where(kept, sorted_probabilities, 0), axis=1)
+    return filtered
+
+def alias_table(probabilities):
+    """
+        Build an alias table (Vose's method) for sampling from a discrete distribution in constant time.
+        Returns the acceptance probability and alias index of every column.
+    """
+    probabilities = np.asarray(probabilities, dtype=float)
+    column_count = len(probabilities)
+    scaled = probabilities * column_count / np.sum(probabilities)
+
+    acceptance = np.ones(column_count)
+    alias = np.arange(column_count)
+
+    small = [column for column in range(column_count) if scaled[column] < 1]
+    large = [column for column in range(column_count) if scaled[column] >= 1]
+
+    # Pair each underfull column with an overfull one, which covers the rest of its probability
+    while small and large:
+        small_column = small.pop()
+        large_column = large.pop()
+
+        acceptance[small_column] = scaled[small_column]
+        alias[small_column] = large_column
+
+        scaled[large_column] += scaled[small_column] - 1
+        if scaled[large_column] < 1:
+            small.append(large_column)
+        else:
+            large.append(large_column)
+
+    return acceptance, alias
+
+def alias_sample(acceptance, alias, n=1):
+    """
+        Sample n indices from an alias table.
+    """
+    columns = np.random.randint(len(acceptance), size=n)
+    return np.where(np.random.uniform(size=n) < acceptance[columns], columns, alias[columns])
@@ -36,6 +36,15 @@ class StatToolsTest(unittest.TestCase):
         actual_scaled_probabilities = apply_temperature(test_probabilities, test_temperature)
         np.testing.assert_allclose(expected_scaled_probabilities, actual_scaled_probabilities, rtol=1e-03)
 
+    def test_apply_temperature_rows(self):
+        """
+            Verify that rows of probabilities are scaled independently.
+        """
+        test_probabilities = np.array([[.2, .2, .6], [.6, .2, .2]])
+        expected_scaled_probabilities = np.array([[0.168117, 0.168117, 0.663765], [0.663765, 0.168117, 0.168117]])
+        actual_scaled_probabilities = apply_temperature(test_probabilities, .8)
+        np.testing.assert_allclose(expected_scaled_probabilities, actual_scaled_probabilities, rtol=1e-03)
+
     def test_apply_temperature_of_one(self):
         """
             Verify that temperature of 1 has no effect on probabilities.
@@ -419,5 +428,79 @@ class StatToolsTest(unittest.TestCase):
             combined_probabilities=test_combine_probabilities
         )
 
+    def test_sample_indices(self):
+        """
+            Verify that one index is sampled per row, in proportion to the probabilities of the row.
+        """
+        test_probabilities = np.array([[0, 0, 1], [1, 0, 0], [0, .5, .5]])
+        samples = np.array([sample_indices(test_probabilities) for _ in range(1000)])
+
+        self.assertEqual(samples.shape, (1000, 3))
+        self.assertTrue(np.all(samples[:, 0] == 2))
+        self.assertTrue(np.all(samples[:, 1] == 0))
+        self.assertTrue(set(samples[:, 2]) == {1, 2})
+        self.assertTrue(400 < np.sum(samples[:, 2] == 1) < 600)
+
+    def test_sample_indices_unnormalized(self):
+        """
+            Verify that rows not summing to 1 are sampled in proportion to their values.
+        """
+        samples = np.array([sample_indices(np.array([2, 0, 6]))[0] for _ in range(1000)])
+        self.assertTrue(set(samples) == {0, 2})
+        self.assertTrue(150 < np.sum(samples == 0) < 350)
+
+    def test_sample_indices_zero_row(self):
+        with self.assertRaises(ValueError):
+            sample_indices(np.array([[0, 1, 0], [0, 0, 0]]))
+
+    def test_top_k_filter(self):
+        test_probabilities = np.array([[.1, .5, .15, .25], [.4, .3, .2, .1]])
+        expected_filtered = np.array([[0, .5, 0, .25], [.4, .3, 0, 0]])
+        np.testing.assert_allclose(top_k_filter(test_probabilities, 2), expected_filtered)
+        np.testing.assert_allclose(top_k_filter(test_probabilities, 4), test_probabilities)
+        with self.assertRaises(ValueError):
+            top_k_filter(test_probabilities, 0)
+
+    def test_top_p_filter(self):
+        """
+            Verify that the most likely probabilities are kept until their total reaches p.
+        """
+        test_probabilities = np.array([[.1, .5, .15, .25], [.4, .3, .2, .1]])
+        np.testing.assert_allclose(top_p_filter(test_probabilities, .7), [[0, .5, 0, .25], [.4, .3, 0, 0]])
+        np.testing.assert_allclose(top_p_filter(test_probabilities, .71), [[0, .5, 0, .25], [.4, .3, .2, 0]])
+        np.testing.assert_allclose(top_p_filter(test_probabilities, .01), [[0, .5, 0, 0], [.4, 0, 0, 0]])
+        np.testing.assert_allclose(top_p_filter(test_probabilities, 1), test_probabilities)
+        for p in [0, -.5, 1.5]:
+            with self.assertRaises(ValueError):
+                top_p_filter(test_probabilities, p)
+
+    def test_top_p_filter_candidate_count(self):
+        test_probabilities = np.array([[.1, .5, .15, .25], [.4, .3, .2, .1]])
+        np.testing.assert_allclose(top_p_filter(test_probabilities, .9, candidate_count=2), [[0, .5, 0, .25], [.4, .3, 0, 0]])
+
+    def test_alias_table(self):
+        """
+            Verify that alias tables reproduce the probabilities of every column.
+        """
+        test_probabilities = np.array([.1, .5, .15, .25])
+        acceptance, alias = alias_table(test_probabilities)
+
+        reconstructed_probabilities = acceptance / 4
+        for column, alias_column in enumerate(alias):
+            reconstructed_probabilities[alias_column] += (1 - acceptance[column]) / 4
+
+        np.testing.assert_allclose(reconstructed_probabilities, test_probabilities)
+
+    def test_alias_table_unnormalized(self):
+        acceptance, alias = alias_table([2, 0, 2])
+        self.assertEqual(acceptance[1], 0)
+        self.assertNotEqual(alias[1], 1)
+
+    def test_alias_sample(self):
+        acceptance, alias = alias_table([.2, 0, .8])
+        samples = alias_sample(acceptance, alias, n=10000)
+        self.assertEqual(set(samples), {0, 2})
+        self.assertTrue(1700 < np.sum(samples == 0) < 2300)
+
 if __name__ == "__main__":
     unittest.main()
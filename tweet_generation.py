@@ -1,20 +1,25 @@
 import pandas as pd
 import numpy as np
-from keras.preprocessing import sequence
 from math import isclose
-from textgenrnn.textgenrnn import textgenrnn_encode_sequence
+from numpy_textgenrnn import encode_sequence
 from stat_tools import *
 
-from textgenrnn import textgenrnn
 from parse_tools import ParseTools
 import re
 import time
+import os
+import multiprocessing
+from collections import OrderedDict
 
 # NOTE:
 # - Custom generation was done in response to generated tweets being too long, having too few punctuations, etc.
+# - Generation works with both textgenrnn objects and NumpyTextgenrnn objects. Keras is only imported when a
+#   stateful model has to be built from a textgenrnn object.
+# - Stateful models and prefix caches are built once and kept on the textgenrnn object.
 
 def custom_generate(textgenrnn_model, prefix=None, temperature=0.2,
-                    max_gen_length=200, weight_adjustments={}, include_stop_token=False):
+                    max_gen_length=200, weight_adjustments={}, include_stop_token=False, abort_predicates=(),
+                    top_k=None, top_p=None):
 
     # Obtain parameters from textgenrnn object
     model = textgenrnn_model.model
@@ -28,47 +33,445 @@ def custom_generate(textgenrnn_model, prefix=None, temperature=0.2,
     text = [meta_token] + list(prefix) if prefix else [meta_token]
     next_char = ''
 
+    multipliers = adjustment_vector(indices_char, weight_adjustments)
+    prefix_cache = get_prefix_cache(textgenrnn_model)
+    start_length = len(text)
+
     while next_char != meta_token and len(text) < max_gen_length:
-        encoded_text = textgenrnn_encode_sequence(text[-maxlen:], vocab, maxlen)
+        encoded_text = encode_sequence(text[-maxlen:], vocab, maxlen)
 
-        # Ignore probability of first element (not accounted for in index char)
-        preds = model.predict(encoded_text, batch_size=1)[0][1:]
+        # Predictions following the prefix are shared by every generation with the same prefix
+        if len(text) == start_length:
+            preds = prefix_cache.get(('preds',) + tuple(encoded_text[0]), lambda: model.predict(encoded_text, batch_size=1))
+        else:
+            preds = model.predict(encoded_text, batch_size=1)
 
-        # Perform weight scaling where applicable
-        # +1 accounts for unused 0-key
-        for index, value in enumerate(preds):
-            if indices_char[index + 1] in weight_adjustments:
-                preds[index] = value * weight_adjustments[indices_char[index + 1]]
+        next_char = indices_char[sample_next_indices(preds, multipliers, temperature, top_k, top_p)[0]]
+        text += [next_char]
 
-        # Scale back to 1
-        preds /= np.sum(preds)
+        # Stop generations that are doomed to be rejected
+        if abort_predicates and next_char != meta_token and should_abort(''.join(text[1:]), abort_predicates):
+            break
 
-        # Apply temperature scaling
-        preds = apply_temperature(preds, temperature)
+    return finish_text(text, include_stop_token)
 
-        # Sample from probabilities to select next characters
-        next_index = np.argmax(np.random.multinomial(1, preds, 1))
-        next_char = indices_char[next_index + 1]  # +1 accounts for unused 0-key
-        text += [next_char]
+def custom_generate_batch(textgenrnn_model, gen_count, batch_size=32, prefix=None, temperature=0.2,
+                          max_gen_length=200, weight_adjustments={}, include_stop_token=False, stateful=False,
+                          abort_predicates=(), top_k=None, top_p=None):
+    """
+        Generate gen_count sequences, advancing up to batch_size of them with each call to the model.
+
+        Sequences that emit the stop token or reach max_gen_length are retired and their slots are
+        refilled with fresh sequences, so the number of model calls shrinks with the batch size.
+        Generations are returned in the order in which they finish.
+
+        When stateful is set, the LSTM state of each sequence is carried forward and only the newest
+        character is fed to the model, instead of re-running the whole maxlen window every step.
+
+        Sequences for which any of abort_predicates returns True (when passed the text generated so
+        far) are retired early, unfinished, freeing their slots for fresh sequences.
+    """
+    return list(custom_generate_stream(textgenrnn_model, gen_count, batch_size, prefix, temperature,
+                                       max_gen_length, weight_adjustments, include_stop_token, stateful,
+                                       abort_predicates, top_k, top_p))
+
+def custom_generate_stream(textgenrnn_model, gen_count=None, batch_size=32, prefix=None, temperature=0.2,
+                           max_gen_length=200, weight_adjustments={}, include_stop_token=False, stateful=False,
+                           abort_predicates=(), top_k=None, top_p=None):
+    """
+        Yields sequences as soon as they finish, decoding as in custom_generate_batch.
+        Sequences are started indefinitely when gen_count is None.
+
+        Encoded windows are kept in a preallocated ring buffer, twice the window length, in which every
+        character is written twice so that the latest window of each row is always a contiguous view.
+        Generated indices are written to a preallocated array and only decoded to a string when a
+        sequence finishes. Active sequences are kept in the leading rows of the buffers.
+    """
+
+    # Obtain parameters from textgenrnn object
+    model = textgenrnn_model.model
+    vocab = textgenrnn_model.vocab
+    indices_char = textgenrnn_model.indices_char
+
+    # Parameters in which all models are trained with
+    maxlen = 40
+    meta_token = '<s>'
+
+    start_text = [meta_token] + list(prefix) if prefix else [meta_token]
+    meta_index = vocab[meta_token]
+
+    # Windows are read from columns head + 1 to head + maxlen, and the newest character sits in column head + maxlen
+    windows = np.zeros((batch_size, 2 * maxlen), dtype='int32')
+    start_window = encode_sequence(start_text[-maxlen:], vocab, maxlen)[0]
+    head = maxlen - 1
+
+    # Generated character indices of every active sequence
+    gen_capacity = max(max_gen_length - len(start_text), 1)
+    outputs = np.zeros((batch_size, gen_capacity), dtype='int32')
+    gen_lengths = np.zeros(batch_size, dtype='int32')
+
+    # Text of every active sequence, only kept when it has to be checked for aborting
+    texts = [''] * batch_size
+    start_string = ''.join(start_text[1:])
+
+    if stateful:
+        step_model = get_stateful_model(textgenrnn_model)
+
+        # All sequences share the state reached just before their last start character
+        start_h, start_c = get_prefix_cache(textgenrnn_model).get(('state',) + tuple(start_window), lambda: prime_state(step_model, start_text[:-1], vocab, maxlen))
+        h = np.zeros((batch_size, start_h.shape[1]), dtype=start_h.dtype)
+        c = np.zeros((batch_size, start_c.shape[1]), dtype=start_c.dtype)
+
+    multipliers = adjustment_vector(indices_char, weight_adjustments)
+
+    active = 0
+    started = 0
+
+    while True:
+
+        # Refill retired slots with fresh sequences
+        while active < batch_size and (gen_count is None or started < gen_count):
+            started += 1
+            if len(start_text) >= max_gen_length:
+                yield finish_text(list(start_text), include_stop_token)
+                continue
+
+            rolled_window = np.roll(start_window, head + 1)
+            windows[active, :maxlen] = rolled_window
+            windows[active, maxlen:] = rolled_window
+            gen_lengths[active] = 0
+            texts[active] = start_string
+            if stateful:
+                h[active] = start_h[0]
+                c[active] = start_c[0]
+            active += 1
+
+        # All sequences have been started and finished
+        if active == 0:
+            return
+
+        if stateful:
+            batch_preds, h[:active], c[:active] = step_model.predict([windows[:active, head + maxlen:head + maxlen + 1], h[:active], c[:active]], batch_size=active)
+        else:
+            batch_preds = model.predict(windows[:active, head + 1:head + 1 + maxlen], batch_size=active)
+
+        next_indices = sample_next_indices(batch_preds, multipliers, temperature, top_k, top_p)
+
+        # Write next characters to the ring buffer and outputs
+        head = (head + 1) % maxlen
+        windows[:active, head] = next_indices
+        windows[:active, head + maxlen] = next_indices
+        outputs[np.arange(active), gen_lengths[:active]] = next_indices
+        gen_lengths[:active] += 1
+
+        finished = (next_indices == meta_index) | (len(start_text) + gen_lengths[:active] >= max_gen_length)
+
+        # Stop generations that are doomed to be rejected
+        if abort_predicates:
+            for row, next_index in enumerate(next_indices):
+                texts[row] += indices_char[next_index]
+                if not finished[row] and should_abort(texts[row], abort_predicates):
+                    finished[row] = True
+
+        # Retire finished rows, moving the last active row into their place
+        for row in np.flatnonzero(finished)[::-1]:
+            generated = [indices_char[index] for index in outputs[row, :gen_lengths[row]]]
+            yield finish_text(start_text + generated, include_stop_token)
+
+            active -= 1
+            if row != active:
+                windows[row] = windows[active]
+                outputs[row] = outputs[active]
+                gen_lengths[row] = gen_lengths[active]
+                texts[row] = texts[active]
+                if stateful:
+                    h[row] = h[active]
+                    c[row] = c[active]
+
+def get_stateful_model(textgenrnn_model):
+    """
+        Returns single-step version of the textgenrnn model, built once and kept on the textgenrnn object.
+
+        The step model takes the newest character index along with the LSTM hidden and cell states,
+        and returns the next character probabilities along with the updated states.
+    """
+    if getattr(textgenrnn_model, 'stateful_model', None) is None:
+        textgenrnn_model.stateful_model = build_stateful_model(textgenrnn_model.model)
+    return textgenrnn_model.stateful_model
+
+class PrefixCache:
+    """
+        Least recently used cache of model outputs keyed by encoded prefix, counting hits and misses.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, compute):
+        """
+            Returns value cached for key, calling compute to obtain and cache it when missing.
+        """
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        value = compute()
+        self.entries[key] = value
+
+        # Evict least recently used entries
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+def get_prefix_cache(textgenrnn_model):
+    """
+        Returns cache of predictions and primed states for prefixes, kept on the textgenrnn object.
+    """
+    if getattr(textgenrnn_model, 'prefix_cache', None) is None:
+        textgenrnn_model.prefix_cache = PrefixCache()
+    return textgenrnn_model.prefix_cache
+
+def build_stateful_model(model):
+    """
+        Copy the weights of a windowed textgenrnn model into a model that advances one character at a time.
+    """
+    from keras.layers import Input, Embedding, Dense, LSTM
+    from keras.models import Model
+
+    embedding = model.get_layer('embedding')
+    rnn = model.get_layer('rnn')
+    output = model.get_layer('output')
+
+    char_input = Input(shape=(1,), name='input')
+    h_input = Input(shape=(rnn.units,), name='h')
+    c_input = Input(shape=(rnn.units,), name='c')
+
+    embedded = Embedding(embedding.input_dim, embedding.output_dim, name='embedding')(char_input)
+    rnn_output, h, c = LSTM(rnn.units, return_state=True, name='rnn')(embedded, initial_state=[h_input, c_input])
+    probabilities = Dense(output.units, activation='softmax', name='output')(rnn_output)
+
+    stateful_model = Model(inputs=[char_input, h_input, c_input], outputs=[probabilities, h, c])
+    for layer_name in ['embedding', 'rnn', 'output']:
+        stateful_model.get_layer(layer_name).set_weights(model.get_layer(layer_name).get_weights())
+
+    return stateful_model
+
+def prime_state(step_model, text, vocab, maxlen=40):
+    """
+        Returns LSTM states after feeding text (left padded to maxlen, as in training) one character at a time.
+
+        States are returned with a leading batch dimension of 1.
+        Priming with the padding reproduces the windowed model's first prediction exactly. Later
+        predictions see the full history rather than a maxlen window, and so differ slightly.
+    """
+    units = step_model.get_layer('rnn').units
+    h = np.zeros((1, units), dtype='float32')
+    c = np.zeros((1, units), dtype='float32')
+
+    # Pad to the full window, less the character that will be fed by the first generation step
+    encoded_text = [0] * (maxlen - 1 - len(text[-(maxlen - 1):])) + [vocab.get(x, 0) for x in text[-(maxlen - 1):]]
+    for index in encoded_text:
+        _, h, c = step_model.predict([np.array([[index]]), h, c], batch_size=1)
+
+    return h, c
+
+def adjustment_vector(indices_char, weight_adjustments):
+    """
+        Returns multipliers for every model output (including the unused 0-key), with weight_adjustments
+        applied to the outputs of matching characters.
+    """
+    multipliers = np.ones(len(indices_char) + 1)
+    for index, char in indices_char.items():
+        if char in weight_adjustments:
+            multipliers[index] = weight_adjustments[char]
+    return multipliers
+
+def sample_next_indices(batch_preds, multipliers, temperature, top_k=None, top_p=None):
+    """
+        Sample the next character index from each row of the model's predictions.
+
+        Sampling can be restricted to the top_k most likely characters and/or to the smallest set of
+        most likely characters whose probabilities add up to top_p (nucleus sampling).
+    """
+
+    # Ignore probability of first element (not accounted for in index char) and perform weight scaling
+    preds = batch_preds[:, 1:] * multipliers[1:]
+
+    # Scale back to 1
+    totals = np.sum(preds, axis=1, keepdims=True)
+    if not np.all(totals > 0):
+        raise ValueError('Weight adjustments leave no character to sample')
+    preds /= totals
+
+    # Apply temperature scaling
+    preds = apply_temperature(preds, temperature)
+
+    # Restrict sampling to the most likely characters
+    if top_k is not None:
+        preds = top_k_filter(preds, top_k)
+    if top_p is not None:
+        preds = top_p_filter(preds, top_p, candidate_count=top_k)
+
+    # Sample from probabilities to select next characters
+    return sample_indices(preds) + 1  # +1 accounts for unused 0-key
+
+def should_abort(text, abort_predicates):
+    return any(abort_predicate(text) for abort_predicate in abort_predicates)
+
+def over_length(text, max_length=280):
+    """
+        Abort predicate for text longer than max_length (the tweet character limit by default).
+    """
+    return len(text) > max_length
+
+def ends_in_symbol_run(text, run_length=6):
+    """
+        Abort predicate for text ending in run_length characters that are not letters, digits or spaces.
+    """
+    tail = text[-run_length:]
+    return len(tail) == run_length and not any(char.isalnum() or char.isspace() for char in tail)
+
+def ends_in_repeated_ngram(text, n=8, repeats=3):
+    """
+        Abort predicate for text whose last n characters have occurred repeats times (ie. looping phrases).
+    """
+    if len(text) < n * repeats:
+        return False
+    return text.count(text[-n:]) >= repeats
+
+def finish_text(text, include_stop_token):
+    """
+        Join generated characters, dropping the initial meta token (and the final stop token if desired).
+    """
     if include_stop_token:
         return ''.join(text[1:])
     else:
         return ''.join(text[1:-1])
 
-def generate(model, gen_count, temperature, weight_adjust={'.': 2, '?': 2, '!': 2, ',': 2}):
+def generate(model, gen_count, temperature, weight_adjust={'.': 2, '?': 2, '!': 2, ',': 2}, batch_size=1, stateful=False,
+             processes=1, seed=None, abort_predicates=(), top_k=None, top_p=None):
+
+    # Shard generation across worker processes
+    if processes is None or processes > 1:
+        return generate_parallel(model, gen_count, temperature, weight_adjust, batch_size=batch_size, stateful=stateful,
+                                 processes=processes, seed=seed, abort_predicates=abort_predicates, top_k=top_k, top_p=top_p)
 
     generations = []
 
-    for _ in range(gen_count):
+    # Batched decoding advances many tweets with each model call
+    if batch_size > 1 or stateful:
+        candidates = custom_generate_batch(model, gen_count, batch_size=batch_size, temperature=temperature, weight_adjustments=weight_adjust, include_stop_token=True, stateful=stateful,
+                                           abort_predicates=abort_predicates, top_k=top_k, top_p=top_p)
+    else:
+        candidates = (custom_generate(model, temperature=temperature, weight_adjustments=weight_adjust, include_stop_token=True, abort_predicates=abort_predicates,
+                                      top_k=top_k, top_p=top_p) for _ in range(gen_count))
+
+    for generation in candidates:
+        tweet = accepted_tweet(generation)
+        if tweet is not None:
+            generations.append(tweet)
 
-        generation = custom_generate(model, temperature=temperature, weight_adjustments=weight_adjust, include_stop_token=True)
+    return generations
 
-        # If generation was able to finish (as opposed to being manually stopped),
-        # and if tweet contains letters (is not just series of symbols)
-        if generation[-3:] == '<s>' and ParseTools.contains_letters(generation[:-3]):
+def generate_stream(model, temperature, target_count=None, time_budget=None, weight_adjust={'.': 2, '?': 2, '!': 2, ',': 2},
+                    batch_size=1, stateful=False, abort_predicates=(), top_k=None, top_p=None):
+    """
+        Yields accepted tweets as soon as they finish, until target_count tweets have been accepted or
+        time_budget seconds have passed. At least one of the two limits must be passed.
+    """
+    if target_count is None and time_budget is None:
+        raise ValueError('Target count or time budget must be passed')
 
-            # Clip stop character and save tweet
-            generation = generation[:-3]
-            generations.append(generation)
+    start_time = time.time()
+    accepted_count = 0
 
-    return generations
+    if target_count is not None and target_count <= 0:
+        return
+
+    for generation in custom_generate_stream(model, batch_size=batch_size, temperature=temperature, weight_adjustments=weight_adjust,
+                                             include_stop_token=True, stateful=stateful, abort_predicates=abort_predicates,
+                                             top_k=top_k, top_p=top_p):
+
+        if time_budget is not None and time.time() - start_time > time_budget:
+            return
+
+        tweet = accepted_tweet(generation)
+        if tweet is None:
+            continue
+
+        yield tweet
+        accepted_count += 1
+
+        if target_count is not None and accepted_count >= target_count:
+            return
+
+def accepted_tweet(generation):
+    """
+        Returns generation (generated with its stop token) with the stop token clipped, or None if it is rejected.
+    """
+
+    # If generation was able to finish (as opposed to being manually stopped),
+    # and if tweet contains letters (is not just series of symbols)
+    if generation[-3:] == '<s>' and ParseTools.contains_letters(generation[:-3]):
+
+        # Clip stop character
+        return generation[:-3]
+
+    return None
+
+# Model held by each generation worker process
+worker_state = dict()
+
+def load_worker_model(model):
+    """
+        Store the model of a generation worker, calling it first if it is a loader.
+    """
+    worker_state['model'] = model() if callable(model) else model
+
+def generate_shard(gen_count, seed, temperature, weight_adjust, batch_size, stateful, abort_predicates, top_k, top_p):
+    """
+        Generate tweets in a worker process with its own seeded random stream.
+    """
+    np.random.seed(seed)
+    return generate(worker_state['model'], gen_count, temperature, weight_adjust, batch_size=batch_size, stateful=stateful,
+                    abort_predicates=abort_predicates, top_k=top_k, top_p=top_p)
+
+def generate_parallel(model, gen_count, temperature, weight_adjust={'.': 2, '?': 2, '!': 2, ',': 2}, batch_size=1,
+                      stateful=False, processes=None, seed=None, abort_predicates=(), top_k=None, top_p=None):
+    """
+        Split gen_count generations evenly across worker processes and merge their accepted tweets.
+
+        model is sent to each worker once, so it must either be picklable (ie. a NumpyTextgenrnn) or be a
+        picklable loader that returns the model (ie. functools.partial(textgenrnn, 'textgenrnn_FET_model')).
+        Every worker draws from an independent random stream spawned from seed, so results are
+        reproducible for a fixed seed and process count. Abort predicates must be picklable as well
+        (ie. module level functions, or functools.partial of them).
+    """
+    if processes is None:
+        processes = os.cpu_count()
+    processes = max(1, min(processes, gen_count))
+
+    shard_counts = [gen_count // processes + (1 if shard < gen_count % processes else 0) for shard in range(processes)]
+    shard_seeds = [seed_sequence.generate_state(4) for seed_sequence in np.random.SeedSequence(seed).spawn(processes)]
+
+    shard_args = [(shard_count, shard_seed, temperature, weight_adjust, batch_size, stateful, abort_predicates, top_k, top_p)
+                  for shard_count, shard_seed in zip(shard_counts, shard_seeds)]
+
+    with multiprocessing.Pool(processes, initializer=load_worker_model, initargs=(model,)) as pool:
+        shards = pool.starmap(generate_shard, shard_args)
+
+    return [tweet for shard in shards for tweet in shard]
@@ -0,0 +1,251 @@
+import unittest
+import functools
+import os
+import numpy as np
+from tweet_generation import *
+from numpy_textgenrnn import NumpyTextgenrnn
+from numpy_textgenrnn_test import write_sample_model
+
+class CountingModel:
+    """
+        Windowed model that predicts 'a' until a window holds length characters after the meta token, then predicts the meta token.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.calls = 0
+
+    def predict(self, x, batch_size=None):
+        self.calls += 1
+        preds = np.zeros((x.shape[0], 4))
+        for row, encoded in enumerate(x):
+            generated = int(np.sum((encoded != 0) & (encoded != 3)))
+            preds[row, 3 if generated >= self.length else 1] = 1
+        return preds
+
+class CountingTextgenrnn:
+
+    def __init__(self, length=3):
+        self.vocab = {'a': 1, 'b': 2, '<s>': 3}
+        self.indices_char = dict((self.vocab[c], c) for c in self.vocab)
+        self.model = CountingModel(length)
+
+class TestTweetGeneration(unittest.TestCase):
+
+    def test_custom_generate(self):
+        self.assertEqual(custom_generate(CountingTextgenrnn()), 'aaa')
+        self.assertEqual(custom_generate(CountingTextgenrnn(), include_stop_token=True), 'aaa<s>')
+        self.assertEqual(custom_generate(CountingTextgenrnn(), prefix='ab'), 'aba')
+
+    def test_custom_generate_prefix_cache(self):
+        """
+            Verify that the prediction following a shared prefix is only computed once.
+        """
+        model = CountingTextgenrnn()
+        custom_generate(model)
+        custom_generate(model)
+        custom_generate(model, prefix='b')
+
+        self.assertEqual(model.model.calls, 4 + 3 + 3)
+        self.assertEqual((model.prefix_cache.hits, model.prefix_cache.misses), (1, 2))
+
+    def test_prefix_cache(self):
+        """
+            Verify that least recently used entries are evicted first.
+        """
+        cache = PrefixCache(maxsize=2)
+        self.assertEqual(cache.get('a', lambda: 1), 1)
+        self.assertEqual(cache.get('b', lambda: 2), 2)
+        self.assertEqual(cache.get('a', lambda: 3), 1)
+        self.assertEqual(cache.get('c', lambda: 4), 4)
+        self.assertEqual(cache.get('b', lambda: 5), 5)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+        cache.clear()
+        self.assertEqual((len(cache), cache.hits, cache.misses), (0, 0, 0))
+
+    def test_custom_generate_batch(self):
+        """
+            Verify that batched generation produces the requested number of generations with fewer model calls.
+        """
+        model = CountingTextgenrnn()
+        generations = custom_generate_batch(model, 10, batch_size=5, include_stop_token=True)
+        self.assertEqual(generations, ['aaa<s>'] * 10)
+        self.assertEqual(model.model.calls, 8)
+
+    def test_custom_generate_batch_windows(self):
+        """
+            Verify that the model is fed the same windows as would be encoded from the generated text.
+        """
+        model = CountingTextgenrnn(length=100)
+        windows = []
+        predict = model.model.predict
+        model.model.predict = lambda x, batch_size=None: windows.append(np.array(x)) or predict(x)
+
+        generations = custom_generate_batch(model, 2, batch_size=2, prefix='b', max_gen_length=50, include_stop_token=True)
+        self.assertEqual(generations, ['b' + 'a' * 48] * 2)
+        self.assertEqual(len(windows), 48)
+
+        for step, window in enumerate(windows):
+            expected_window = encode_sequence(['<s>', 'b'] + ['a'] * step, model.vocab, 40)
+            np.testing.assert_array_equal(window, np.concatenate([expected_window, expected_window]))
+
+    def test_custom_generate_batch_max_gen_length(self):
+        generations = custom_generate_batch(CountingTextgenrnn(length=50), 3, batch_size=2, max_gen_length=5, include_stop_token=True)
+        self.assertEqual(generations, ['aaaa'] * 3)
+
+    def test_generate_filters_unfinished(self):
+        self.assertEqual(generate(CountingTextgenrnn(), 4, temperature=.2, batch_size=3), ['aaa'] * 4)
+        self.assertEqual(generate(CountingTextgenrnn(length=250), 2, temperature=.2), [])
+
+    def test_sample_next_indices_top_k_top_p(self):
+        """
+            Verify that only the most likely characters are sampled when top_k or top_p is passed.
+        """
+        batch_preds = np.array([[0, .3, .35, .35], [0, .6, .3, .1]])
+        multipliers = np.ones(4)
+        for _ in range(50):
+            next_indices = sample_next_indices(batch_preds, multipliers, 1.0, top_k=1)
+            self.assertIn(next_indices[0], {2, 3})
+            self.assertEqual(next_indices[1], 1)
+            self.assertNotIn(1, sample_next_indices(batch_preds, multipliers, 1.0, top_p=.6)[:1])
+            self.assertEqual(sample_next_indices(batch_preds, multipliers, 1.0, top_p=.5)[1], 1)
+
+    def test_sample_next_indices_invalid(self):
+        """
+            Verify that invalid top_k or top_p, and rows weighted to zero probability, raise errors.
+        """
+        batch_preds = np.array([[0, .3, .35, .35]])
+        with self.assertRaises(ValueError):
+            sample_next_indices(batch_preds, np.ones(4), 1.0, top_k=0)
+        with self.assertRaises(ValueError):
+            sample_next_indices(batch_preds, np.ones(4), 1.0, top_p=1.5)
+        with self.assertRaises(ValueError):
+            sample_next_indices(np.array([[1, 0, 0, 0]]), np.ones(4), 1.0)
+
+    def test_abort_predicates(self):
+        self.assertTrue(over_length('a' * 281))
+        self.assertFalse(over_length('a' * 280))
+        self.assertTrue(ends_in_symbol_run('Hello ?!?!?!'))
+        self.assertFalse(ends_in_symbol_run('Hello ?!?!? !'))
+        self.assertFalse(ends_in_symbol_run('?!'))
+        self.assertTrue(ends_in_repeated_ngram('the globe the globe the globe', n=9, repeats=3))
+        self.assertFalse(ends_in_repeated_ngram('the globe the globe is flat', n=9, repeats=3))
+
+    def test_custom_generate_abort(self):
+        """
+            Verify that generations are cut as soon as an abort predicate returns True.
+        """
+        model = CountingTextgenrnn(length=100)
+        abort_predicates = [functools.partial(over_length, max_length=5)]
+        self.assertEqual(custom_generate(model, include_stop_token=True, abort_predicates=abort_predicates), 'aaaaaa')
+        self.assertEqual(model.model.calls, 6)
+
+    def test_custom_generate_batch_abort(self):
+        """
+            Verify that aborted generations are retired unfinished and counted as generations.
+        """
+        model = CountingTextgenrnn(length=100)
+        abort_predicates = [functools.partial(over_length, max_length=5)]
+        generations = custom_generate_batch(model, 3, batch_size=2, include_stop_token=True, abort_predicates=abort_predicates)
+        self.assertEqual(generations, ['aaaaaa'] * 3)
+        self.assertEqual(generate(model, 3, temperature=.2, batch_size=2, abort_predicates=abort_predicates), [])
+
+    def test_custom_generate_stream(self):
+        stream = custom_generate_stream(CountingTextgenrnn(), batch_size=4)
+        self.assertEqual([next(stream) for _ in range(9)], ['aaa'] * 9)
+
+    def test_generate_stream_target_count(self):
+        self.assertEqual(list(generate_stream(CountingTextgenrnn(), temperature=.2, target_count=5, batch_size=2)), ['aaa'] * 5)
+        self.assertEqual(list(generate_stream(CountingTextgenrnn(), temperature=.2, target_count=0)), [])
+
+    def test_generate_stream_time_budget(self):
+        """
+            Verify that streaming stops once the time budget is spent, even when no tweet is ever accepted.
+        """
+        start_time = time.time()
+        self.assertEqual(list(generate_stream(CountingTextgenrnn(length=250), temperature=.2, time_budget=.2)), [])
+        self.assertLess(time.time() - start_time, 5)
+
+    def test_generate_stream_without_limits(self):
+        with self.assertRaises(ValueError):
+            next(generate_stream(CountingTextgenrnn(), temperature=.2))
+
+    def test_generate_parallel(self):
+        """
+            Verify that generations are split across processes and merged.
+        """
+        self.assertEqual(generate(CountingTextgenrnn(), 7, temperature=.2, processes=3, seed=0), ['aaa'] * 7)
+        self.assertEqual(generate_parallel(CountingTextgenrnn, 2, temperature=.2, processes=4), ['aaa'] * 2)
+
+class TestStatefulGeneration(unittest.TestCase):
+
+    def setUp(self):
+        write_sample_model('sample_generation_weights.hdf5', 'sample_generation_vocab.json')
+        self.model = NumpyTextgenrnn('sample_generation_weights.hdf5', 'sample_generation_vocab.json')
+
+        # Record the outputs of every step
+        self.step_outputs = []
+        predict = self.model.stateful_model.predict
+
+        def recording_predict(inputs, batch_size=None):
+            outputs = predict(inputs, batch_size=batch_size)
+            self.step_outputs.append(outputs[0])
+            return outputs
+
+        self.model.stateful_model.predict = recording_predict
+
+    def tearDown(self):
+        os.remove('sample_generation_weights.hdf5')
+        os.remove('sample_generation_vocab.json')
+
+    def first_stateful_preds(self, prefix):
+        """
+            Returns predictions of the first stateful generation step, after priming the state with the prefix.
+        """
+        start_length = 1 + len(prefix)
+        custom_generate_batch(self.model, 1, batch_size=1, prefix=prefix, stateful=True, max_gen_length=start_length + 1)
+        return self.step_outputs[-1]
+
+    def test_first_prediction_matches_windowed_model(self):
+        encoded = encode_sequence(['<s>'], self.model.vocab, 40)
+        np.testing.assert_allclose(self.first_stateful_preds(''), self.model.model.predict(encoded), rtol=1e-5)
+
+    def test_prefix_primes_state(self):
+        """
+            Verify that the state primed with a prefix gives the windowed model's prediction following the prefix.
+        """
+        encoded = encode_sequence(['<s>', 'a', 'c', 'b'], self.model.vocab, 40)
+        np.testing.assert_allclose(self.first_stateful_preds('acb'), self.model.model.predict(encoded), rtol=1e-5)
+
+        # Primed states are cached by prefix
+        self.step_outputs = []
+        self.first_stateful_preds('acb')
+        self.assertEqual(len(self.step_outputs), 1)
+
+    def test_retired_rows_refilled(self):
+        """
+            Verify that every generation, as sequences retire and slots are refilled, was sampled from the
+            predictions of its own history, by replaying each generation one character at a time.
+        """
+        np.random.seed(0)
+        generations = custom_generate_batch(self.model, 7, batch_size=3, prefix='b', temperature=1.0, max_gen_length=12,
+                                            include_stop_token=True, stateful=True)
+        self.assertEqual(len(generations), 7)
+        self.assertGreater(len(set(map(len, generations))), 1)
+
+        recorded_preds = np.concatenate(self.step_outputs)
+        step_model = self.model.stateful_model
+        for generation in generations:
+            chars = list(generation[:-3]) + ['<s>'] if generation.endswith('<s>') else list(generation)
+            self.assertEqual(chars[0], 'b')
+
+            h, c = prime_state(step_model, ['<s>'], self.model.vocab)
+            for char in chars[:-1]:
+                preds, h, c = step_model.predict([np.array([[self.model.vocab[char]]]), h, c], batch_size=1)
+                self.assertLess(np.min(np.max(np.abs(recorded_preds - preds), axis=1)), 1e-5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+    Counting of many words (or patterns) in strings, as done by the functions of ParseTools.get_count_funcs.
+"""
+
+import re
+import numpy as np
+
+def literals_overlap(first, second):
+    """
+        Returns whether occurrences of the two literals can share characters, ie. one contains the
+        other, or a suffix of one is a prefix of the other.
+    """
+    if first in second or second in first:
+        return True
+    for length in range(1, min(len(first), len(second))):
+        if first.endswith(second[:length]) or second.endswith(first[:length]):
+            return True
+    return False
+
+# Characters with a special meaning in regular expressions
+regex_special_chars = set('.^$*+?{}[]\\|()')
+
+class WordCounter:
+    """
+        Counts every word in a string with as few scans as possible, giving the same counts as
+        len(re.findall(word, string)) for each word.
+
+        Literal words whose occurrences can never overlap are counted together with one combined
+        regular expression, since a leftmost scan over their alternation finds the same occurrences as
+        scanning for each alone. Other words (patterns, empty or overlapping words) get a scan of their own.
+    """
+
+    def __init__(self, words):
+        self.words = list(words)
+
+        self.groups = []
+        self.patterns = []
+        for word in dict.fromkeys(self.words):
+            if word == '' or regex_special_chars.intersection(word):
+                self.patterns.append((re.compile(word), word))
+                continue
+
+            for group in self.groups:
+                if not any(literals_overlap(word, member) for member in group):
+                    group.append(word)
+                    break
+            else:
+                self.groups.append([word])
+
+        # Longer words first, although no word of a group is a prefix of another
+        self.group_res = [re.compile('|'.join(re.escape(word) for word in sorted(group, key=len, reverse=True))) for group in self.groups]
+
+        self.word_columns = dict()
+        for column, word in enumerate(self.words):
+            self.word_columns.setdefault(word, []).append(column)
+
+    @property
+    def names(self):
+        return ['count-' + word for word in self.words]
+
+    def count_list(self, string):
+        counts = [0] * len(self.words)
+        for group_re in self.group_res:
+            for word in group_re.findall(string):
+                for column in self.word_columns[word]:
+                    counts[column] += 1
+        for pattern, word in self.patterns:
+            count = len(pattern.findall(string))
+            for column in self.word_columns[word]:
+                counts[column] = count
+        return counts
+
+    def counts(self, string):
+        """
+            Returns vector of counts of each word in string.
+        """
+        return np.array(self.count_list(string), dtype='int64')
+
+    def count_matrix(self, strings):
+        """
+            Returns matrix of counts with a row per string and a column per word (ie. as classifier features).
+        """
+        rows = [self.count_list(string) for string in strings]
+        return np.array(rows, dtype='int64').reshape(len(rows), len(self.words))
@@ -0,0 +1,41 @@
+import unittest
+import re
+import numpy as np
+from word_counter import *
+
+class TestWordCounter(unittest.TestCase):
+
+    def test_literals_overlap(self):
+        self.assertTrue(literals_overlap('news', 'fake news'))
+        self.assertTrue(literals_overlap('abc', 'cde'))
+        self.assertTrue(literals_overlap('cde', 'abc'))
+        self.assertFalse(literals_overlap('wall', 'border'))
+
+    def test_counts(self):
+        counter = WordCounter(['John', 'Jacob', 'ohn'])
+        np.testing.assert_array_equal(counter.counts("String with John twice John and Jacob"), [2, 1, 2])
+        self.assertEqual(counter.names, ['count-John', 'count-Jacob', 'count-ohn'])
+
+    def test_counts_match_findall(self):
+        """
+            Verify that counts equal those of re.findall for overlapping, repeated and pattern words.
+        """
+        words = ['aa', 'ab', 'ba', 'b', 'aa', 'a+', 'c', '']
+        strings = ['aaab', 'abababa', 'aaaa', 'cab c', '']
+        expected = [[len(re.findall(word, string)) for word in words] for string in strings]
+        np.testing.assert_array_equal(WordCounter(words).count_matrix(strings), expected)
+
+    def test_groups(self):
+        """
+            Verify that words that cannot overlap share a scan.
+        """
+        counter = WordCounter(['wall', 'border', 'all', 'MAGA', 'fake news', 'news?'])
+        self.assertEqual(counter.groups, [['wall', 'border', 'MAGA', 'fake news'], ['all']])
+        self.assertEqual([word for _, word in counter.patterns], ['news?'])
+
+    def test_count_matrix_shape(self):
+        self.assertEqual(WordCounter(['a', 'b']).count_matrix([]).shape, (0, 2))
+        self.assertEqual(WordCounter([]).count_matrix(['a']).shape, (1, 0))
+
+if __name__ == "__main__":
+    unittest.main()